@@ -0,0 +1,222 @@
+import asyncio
+import json
+import weakref
+from urllib.parse import urlsplit
+
+from ollama_client import DEFAULT_BASE_URL
+from stream_decoder import NDJSONStreamDecoder
+
+
+class OllamaStreamError(Exception):
+    """Raised when Ollama answers with an HTTP error or an error chunk"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncOllamaClient:
+    """Asyncio-native Ollama client with pooled keep-alive connections (stdlib only)"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, connect_timeout=3.05, read_timeout=120,
+                 max_idle_connections=16):
+        parts = urlsplit(base_url)
+        self.base_url = base_url.rstrip("/")
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 80
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_idle_connections = max_idle_connections
+        self._idle = []
+        self.connections_opened = 0
+        self.request_count = 0
+
+    async def _acquire(self):
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        self.connections_opened += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.connect_timeout)
+
+    def _release(self, reader, writer, reusable):
+        if reusable and len(self._idle) < self.max_idle_connections and not writer.is_closing():
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def _read_line(self, reader):
+        return await asyncio.wait_for(reader.readline(), self.read_timeout)
+
+    async def _request(self, method, path, payload=None):
+        """Send a request and yield raw body byte blocks as they arrive"""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\n"
+                f"Host: {self.host}:{self.port}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: keep-alive\r\n\r\n").encode("ascii")
+
+        reader, writer = await self._acquire()
+        self.request_count += 1
+        reusable = False
+        try:
+            writer.write(head + body)
+            await writer.drain()
+
+            status_line = await self._read_line(reader)
+            if not status_line:
+                raise ConnectionError("Connection closed by Ollama")
+            status = int(status_line.split()[1])
+
+            headers = {}
+            while True:
+                line = await self._read_line(reader)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            if status >= 400:
+                error_body = b""
+                if "content-length" in headers:
+                    error_body = await reader.readexactly(int(headers["content-length"]))
+                try:
+                    message = json.loads(error_body).get("error", "")
+                except ValueError:
+                    message = error_body.decode("utf-8", "replace")
+                reusable = "content-length" in headers
+                raise OllamaStreamError(f"{status} error from Ollama: {message}", status=status)
+
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    size_line = await self._read_line(reader)
+                    size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                    if size == 0:
+                        # Skip trailers up to the terminating blank line
+                        while (await self._read_line(reader)) not in (b"\r\n", b"\n", b""):
+                            pass
+                        break
+                    block = await asyncio.wait_for(reader.readexactly(size + 2), self.read_timeout)
+                    yield block[:-2]
+            else:
+                remaining = int(headers.get("content-length", 0))
+                while remaining > 0:
+                    block = await asyncio.wait_for(reader.read(min(remaining, 65536)), self.read_timeout)
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    yield block
+            reusable = headers.get("connection", "").lower() != "close"
+        finally:
+            # A cancelled or abandoned stream drops the socket so Ollama stops generating
+            self._release(reader, writer, reusable)
+
+    async def stream_json(self, path, payload, decoder=None):
+        """Yield each NDJSON object from a streaming endpoint"""
+        decoder = decoder or NDJSONStreamDecoder()
+        stream = self._request("POST", path, payload)
+        try:
+            async for block in stream:
+                for content, _ in decoder.feed(block):
+                    yield content
+            for content, _ in decoder.finish():
+                yield content
+        finally:
+            await stream.aclose()
+
+    async def get_tags(self):
+        body = b""
+        async for block in self._request("GET", "/api/tags"):
+            body += block
+        return json.loads(body)
+
+    async def aclose(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+_loop_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(base_url=DEFAULT_BASE_URL):
+    """Return the client shared by every coroutine on the running loop for `base_url`"""
+    loop = asyncio.get_running_loop()
+    clients = _loop_clients.setdefault(loop, {})
+    if base_url not in clients:
+        clients[base_url] = AsyncOllamaClient(base_url)
+    return clients[base_url]
+
+
+class GenerationStream:
+    """Async iterator of text deltas from /api/generate; `final` holds the last chunk"""
+
+    def __init__(self, client, data):
+        self.client = client
+        self.data = dict(data, stream=True)
+        self.decoder = NDJSONStreamDecoder()
+        self.final = None
+        self.chunk_count = 0
+        self._source = None
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        self._source = self.client.stream_json("/api/generate", self.data, self.decoder)
+        try:
+            async for content in self._source:
+                if 'error' in content:
+                    raise OllamaStreamError(content['error'])
+                delta = content.get('response', '')
+                if delta:
+                    self.chunk_count += 1
+                    yield delta
+                if content.get('done'):
+                    # Keep reading to the end of the body so the connection can be reused
+                    self.final = content
+        finally:
+            await self.aclose()
+
+    async def aclose(self):
+        if self._source is not None:
+            await self._source.aclose()
+
+
+async def run_debate_async(agent1, agent2, topic, debate_context, rounds=4,
+                           callback=None, web_research=False, client=None, cancel_token=None):
+    """Drive one debate on the current event loop and return its transcript"""
+    transcript = []
+    message = f"Make your opening statement on why your position on {topic} is correct. Be focused and persuasive."
+    current_agent, other_agent = agent1, agent2
+    for round_number in range(rounds):
+        if cancel_token is not None and cancel_token.is_set():
+            break
+        round_note = f"This is round {round_number + 1} of the discussion. Consider previous points raised and develop the conversation further."
+        response = await current_agent.respond_to_async(
+            message, other_agent, debate_context, callback=callback,
+            web_research=web_research, async_client=client, turn_note=round_note,
+            cancel_token=cancel_token)
+        transcript.append({"round": round_number + 1, "agent": current_agent.name, "response": response})
+        current_agent, other_agent = other_agent, current_agent
+        message = response
+    return transcript
+
+
+async def run_debates_async(debates, max_concurrent=32, client=None):
+    """Run many debates on one event loop; `debates` holds kwargs for run_debate_async"""
+    client = client or AsyncOllamaClient()
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def run_one(kwargs):
+        async with semaphore:
+            return await run_debate_async(client=client, **kwargs)
+
+    try:
+        return await asyncio.gather(*(run_one(kwargs) for kwargs in debates),
+                                    return_exceptions=True)
+    finally:
+        await client.aclose()
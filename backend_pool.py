@@ -0,0 +1,285 @@
+"""Load balancing across several Ollama hosts
+
+BackendPool is a drop-in for OllamaClient that spreads requests over a list
+of endpoints:
+
+    client = BackendPool(["http://gpu1:11434", "http://gpu2:11434"])
+    client.start_health_checks()
+
+Each request goes to the healthy host with the fewest requests in flight
+among those that have the requested model. A request that fails before
+streaming starts (connection refused, timeout, 5xx, or 404 for a missing
+model) is retried on the next host. Hosts that cannot be reached are marked
+down until a health check succeeds (or `retry_after` seconds pass without
+health checks running).
+"""
+import itertools
+import threading
+import time
+
+import requests
+
+from ollama_client import DEFAULT_BASE_URL, OllamaClient
+
+
+class NoBackendAvailable(requests.exceptions.ConnectionError):
+    """No healthy host could take the request"""
+
+
+class Backend:
+    """One Ollama host: its client, health, installed models and load"""
+
+    def __init__(self, client):
+        self.client = client
+        self.base_url = client.base_url
+        self.healthy = True  # optimistic until a request or probe says otherwise
+        self.models = None  # None until the first successful /api/tags
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.down_since = None
+        self.last_error = None
+
+    def has_model(self, model):
+        return self.models is None or model in self.models
+
+    def stats(self):
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "models": sorted(self.models) if self.models is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class PooledResponse:
+    """A backend's response that gives its in-flight slot back once it is consumed or closed"""
+
+    def __init__(self, response, release):
+        self._response = response
+        self._release = release
+        self._released = False
+        self.aborted = False
+        self.status_code = response.status_code
+        self.raw = response.raw  # lets OllamaClient.abort reach the socket
+
+    def _done(self, error=None):
+        if not self._released:
+            self._released = True
+            self._release(error)
+
+    def iter_content(self, chunk_size=None):
+        try:
+            yield from self._response.iter_content(chunk_size=chunk_size)
+        except requests.exceptions.RequestException as e:
+            # The host dropped mid-stream (unless we cut it ourselves); later turns go elsewhere
+            self._done(None if self.aborted else e)
+            raise
+        self._done()
+
+    def json(self):
+        try:
+            return self._response.json()
+        finally:
+            self._done()
+
+    def close(self):
+        self._response.close()
+        self._done()
+
+
+class BackendPool:
+    """Least-outstanding-requests balancing with failover over several Ollama hosts"""
+
+    def __init__(self, base_urls, retry_after=15.0, health_interval=10.0, **client_kwargs):
+        if not base_urls:
+            raise ValueError("BackendPool needs at least one base URL")
+        self.backends = [Backend(OllamaClient(url, **client_kwargs)) for url in base_urls]
+        self.retry_after = retry_after
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._order = itertools.count()  # rotates ties between equally loaded hosts
+        self._stop_event = threading.Event()
+        self._health_thread = None
+        self.failovers = 0
+
+    @property
+    def base_url(self):
+        # For code that needs a single host (the asyncio engine): the least loaded one
+        with self._lock:
+            candidates = self._candidates(None) or self.backends
+            return min(candidates, key=lambda backend: backend.outstanding).base_url
+
+    def _candidates(self, model):
+        now = time.monotonic()
+        candidates = []
+        for backend in self.backends:
+            if not backend.healthy and now - backend.down_since < self.retry_after:
+                continue
+            if model is None or backend.has_model(model):
+                candidates.append(backend)
+        return candidates
+
+    def _acquire(self, model, exclude):
+        """Pick the least loaded eligible host and count the request against it"""
+        with self._lock:
+            candidates = [backend for backend in self._candidates(model) if backend not in exclude]
+            if not candidates:
+                return None
+            start = next(self._order)
+            # Rotate before taking the minimum so ties do not always land on the first host
+            rotated = candidates[start % len(candidates):] + candidates[:start % len(candidates)]
+            backend = min(rotated, key=lambda candidate: candidate.outstanding)
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend, error=None):
+        with self._lock:
+            backend.outstanding -= 1
+            if error is not None:
+                self._mark_down(backend, error)
+
+    def _mark_down(self, backend, error):
+        backend.failures += 1
+        backend.last_error = str(error)
+        if backend.healthy:
+            print(f"Ollama host {backend.base_url} is down: {error}")
+        backend.healthy = False
+        backend.down_since = time.monotonic()
+
+    def _mark_up(self, backend, models):
+        with self._lock:
+            if not backend.healthy:
+                print(f"Ollama host {backend.base_url} is back")
+            backend.healthy = True
+            backend.down_since = None
+            backend.models = set(models)
+
+    def _refresh_backend(self, backend):
+        try:
+            tags = backend.client.get_tags()
+        except requests.exceptions.RequestException as e:
+            with self._lock:
+                self._mark_down(backend, e)
+            return None
+        models = [m["name"] for m in tags.get("models", [])]
+        self._mark_up(backend, models)
+        return models
+
+    def get_tags(self):
+        """Every model available on at least one healthy host (refreshes each host's list)"""
+        names = []
+        for backend in self.backends:
+            for name in self._refresh_backend(backend) or ():
+                if name not in names:
+                    names.append(name)
+        if not any(backend.healthy for backend in self.backends):
+            raise NoBackendAvailable("No Ollama host is reachable")
+        return {"models": [{"name": name, "model": name} for name in names]}
+
+    def generate(self, data, stream=True):
+        """Start /api/generate on the best host, failing over to the others"""
+        model = data.get("model")
+        tried = []
+        last_error = None
+        while True:
+            backend = self._acquire(model, tried)
+            if backend is None:
+                break
+            tried.append(backend)
+            try:
+                response = backend.client.generate(data, stream=stream)
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else None
+                if status == 404:
+                    # This host lacks the model; note that and look elsewhere
+                    self._release(backend)
+                    with self._lock:
+                        known = backend.models is not None
+                        if known:
+                            backend.models.discard(model)
+                    if not known:
+                        self._refresh_backend(backend)
+                elif status is not None and status >= 500:
+                    with self._lock:
+                        backend.failures += 1
+                        backend.last_error = str(e)
+                    self._release(backend)
+                else:
+                    self._release(backend)
+                    raise
+                last_error = e
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._release(backend, e)
+                last_error = e
+            else:
+                if len(tried) > 1:
+                    with self._lock:
+                        self.failovers += 1
+                return PooledResponse(response, lambda error, backend=backend: self._release(backend, error))
+        if last_error is not None:
+            raise last_error
+        raise NoBackendAvailable(f"No healthy Ollama host has {model}")
+
+    @staticmethod
+    def abort(response):
+        if isinstance(response, PooledResponse):
+            response.aborted = True  # a cancelled turn says nothing about the host's health
+        OllamaClient.abort(response)
+
+    def check_health(self):
+        """Probe every host once; returns how many are healthy"""
+        for backend in self.backends:
+            self._refresh_backend(backend)
+        return sum(backend.healthy for backend in self.backends)
+
+    def start_health_checks(self, interval=None):
+        """Probe every host each `interval` seconds so down hosts rejoin and model lists stay current"""
+        if self._health_thread and self._health_thread.is_alive():
+            return
+        interval = interval or self.health_interval
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        self._stop_event.set()
+
+    def pool_stats(self):
+        """OllamaClient.pool_stats summed over the hosts, plus each host's state"""
+        per_host = [backend.client.pool_stats() for backend in self.backends]
+        connections = sum(stats["connections_opened"] for stats in per_host)
+        pool_requests = sum(stats["pool_requests"] for stats in per_host)
+        with self._lock:
+            backends = [backend.stats() for backend in self.backends]
+        return {
+            "base_url": ", ".join(backend.base_url for backend in self.backends),
+            "requests": sum(stats["requests"] for stats in per_host),
+            "connections_opened": connections,
+            "pool_requests": pool_requests,
+            "reuse_ratio": (1 - connections / pool_requests) if pool_requests else 0.0,
+            "failovers": self.failovers,
+            "backends": backends,
+        }
+
+    def close(self):
+        self.stop_health_checks()
+        for backend in self.backends:
+            backend.client.close()
+
+
+def make_client(hosts=None, **kwargs):
+    """An OllamaClient for one host, or a BackendPool for several"""
+    hosts = [host for host in (hosts or [DEFAULT_BASE_URL]) if host]
+    if len(hosts) == 1:
+        return OllamaClient(hosts[0], **kwargs)
+    return BackendPool(hosts, **kwargs)
@@ -0,0 +1,328 @@
+"""Headless batch debate runner
+
+Runs many fixed-length debates concurrently on a bounded worker pool and
+appends one JSON line per finished debate to the output file.
+
+Jobs file formats:
+- JSONL: one debate per line, e.g. {"topic": "...", "agents": ["jamal_carter", "andrew_wallace"]}
+- JSON: a list of debates, or {"personas": {...}, "debates": [...]} where "personas" adds
+  persona definitions (same fields as personas.PERSONAS) referenced by key
+
+Agents are persona keys from personas.PERSONAS (or the file's "personas") or
+inline persona dicts. A debate may override "rounds", "mode" and "stances", and
+set a generation "budget" (fields of generation_budget.GenerationBudget) and a
+"memory_budget" in tokens for the rolling transcript memory, which
+--summary-model can summarize with a smaller model than the speakers'.
+
+A debate with more than two "agents" runs as a panel (debate_engine.run_panel_turns):
+"stances" defaults to alternating pro/con, "scheduler" is one of
+turn_scheduler.SCHEDULERS, "rebuttals" lets everyone answer each speaker at
+once, and "audience" lists agents that react to every turn.
+
+With --web-research each turn is grounded in search results. With
+--research-backend local they come from a BM25 index over local documents
+(local_index.py) instead of DuckDuckGo, so research works offline:
+
+    python batch_runner.py jobs.jsonl --web-research --research-backend local --research-docs notes/
+
+With --judge (or "judge": true in a job) every turn is also rated and
+summarized by judge.TurnJudge while the debate runs; the record gets
+"judgements" and per-agent "scores".
+
+    python batch_runner.py jobs.jsonl --out transcripts.jsonl --workers 4 --rounds 6
+
+With --response-cache a run can be recorded once and replayed without Ollama,
+e.g. to benchmark the pipeline deterministically (set a budget "seed" so the
+recorded requests are reproducible):
+
+    python batch_runner.py jobs.jsonl --response-cache responses.sqlite3 --cache-mode record
+    python batch_runner.py jobs.jsonl --response-cache responses.sqlite3 --cache-mode replay --replay-delay none
+
+Before the first debate every model the jobs use is loaded and kept
+resident for --keep-alive (model_scheduler.warm_up). When the jobs need more
+models than the host keeps loaded, --max-loaded-models N (the host's
+OLLAMA_MAX_LOADED_MODELS) groups concurrent turns, judge and summary
+requests by model so the host swaps models in batches instead of on every
+turn; the summary reports the swaps.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ai_agent import DEFAULT_MODEL
+from backend_pool import make_client
+from cancellation import CancelToken
+from debate_engine import build_debate_context, run_debate_turns, run_panel_turns
+from debate_memory import DebateMemory, ModelSummarizer
+from judge import TurnJudge
+from metrics import SWAP_LOAD_MS, JSONLSink
+from model_scheduler import ModelSwapScheduler, warm_up
+from ollama_client import DEFAULT_BASE_URL, OllamaClient
+from pacing import PacingPolicy
+from personas import make_agent, resolve_persona
+import profiler
+from research import RESEARCH_BACKENDS, make_research_cache
+from turn_scheduler import make_scheduler
+from response_cache import CACHE_MODES, wrap_client
+
+
+def load_jobs(path):
+    """Return (debates, extra_personas) from a JSON or JSONL jobs file"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()], {}
+        data = json.load(f)
+    if isinstance(data, list):
+        return data, {}
+    return data["debates"], data.get("personas", {})
+
+
+class BatchRunner:
+    """Runs debate jobs on a bounded thread pool and writes transcripts to JSONL"""
+
+    def __init__(self, out_path, workers=4, rounds=4, client=None, research_cache=None,
+                 web_research=False, model=None, extra_personas=None, metrics_sink=None, memory_budget=0,
+                 judge=False, judge_model=None, keep_alive=None, model_scheduler=None, summary_model=None):
+        self.out_path = out_path
+        self.workers = workers
+        self.rounds = rounds
+        # The connection pool is sized so every worker can hold a keep-alive connection
+        self.client = client or OllamaClient(pool_maxsize=max(16, workers))
+        self.research_cache = research_cache
+        self.web_research = web_research
+        self.model = model
+        self.extra_personas = extra_personas or {}
+        self.metrics_sink = metrics_sink
+        self.memory_budget = memory_budget  # 0: speakers only see the previous turn
+        self.summary_model = summary_model  # model for memory summaries, defaults to the first agent's
+        self.judge = judge
+        self.judge_model = judge_model  # defaults to the first agent's model
+        self.keep_alive = keep_alive
+        self.model_scheduler = model_scheduler  # a ModelSwapScheduler shared by every worker
+        self.stop_event = CancelToken()  # aborts in-flight turns on Ctrl+C
+        self._write_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def build_agents(self, job, key="agents"):
+        specs = job.get(key, [])
+        if key == "agents" and len(specs) < 2:
+            raise ValueError("Batch debates need at least two agents")
+        stances = job.get("stances", ["pro", "con"] * ((len(specs) + 1) // 2)) if key == "agents" else []
+        stances = list(stances) + ["neutral"] * (len(specs) - len(stances))
+        agents = []
+        for spec, stance in zip(specs, stances):
+            overrides = {"client": self.client, "default_stance": stance, "metrics_sink": self.metrics_sink}
+            if self.research_cache is not None:
+                overrides["research_cache"] = self.research_cache
+            if self.model:
+                overrides["model"] = self.model
+            agent = make_agent(resolve_persona(spec, self.extra_personas), **overrides)
+            if job.get("mode") == "collaborate":
+                agent.set_mode("collaborate")
+            if "budget" in job:
+                agent.set_generation_budget(job["budget"])
+            agent.set_model_scheduling(self.model_scheduler, self.keep_alive)
+            agents.append(agent)
+        return agents
+
+    def job_models(self, jobs):
+        """Every model the jobs' agents use, most used first"""
+        counts = {}
+        for job in jobs:
+            for spec in job.get("agents", []) + job.get("audience", []):
+                try:
+                    model = self.model or resolve_persona(spec, self.extra_personas).get("model", DEFAULT_MODEL)
+                except (KeyError, ValueError):
+                    continue  # reported when the job runs
+                counts[model] = counts.get(model, 0) + 1
+        return sorted(counts, key=counts.get, reverse=True)
+
+    def run_job(self, index, job):
+        started_at = time.time()
+        span_start = time.perf_counter()
+        record = {"id": job.get("id", index), "topic": job["topic"]}
+        memory = judge = None
+        try:
+            agents = self.build_agents(job)
+            record["agents"] = [agent.name for agent in agents]
+            mode_type = "collaborative discussion" if job.get("mode") == "collaborate" else "debate"
+            memory_budget = job.get("memory_budget", self.memory_budget)
+            memory = (DebateMemory(ModelSummarizer(self.client, self.summary_model or agents[0].model,
+                                                   model_scheduler=self.model_scheduler),
+                                   token_budget=memory_budget)
+                      if memory_budget else None)
+            judge = (TurnJudge(self.client, self.judge_model or agents[0].model, job["topic"],
+                               model_scheduler=self.model_scheduler)
+                     if job.get("judge", self.judge) else None)
+
+            def judge_turn(turn):
+                # Audience reactions are not part of the debate being scored
+                if not turn["error"] and turn["round"] != "reaction":
+                    judge.submit(turn["agent"], turn["response"], turn=turn["round"])
+
+            settings = dict(
+                rounds=job.get("rounds", self.rounds),
+                debate_context=build_debate_context(job["topic"], mode_type),
+                web_research=job.get("web_research", self.web_research),
+                pacing=PacingPolicy.none(),
+                stop_event=self.stop_event,
+                memory=memory,
+                on_turn=judge_turn if judge else None,
+            )
+            if len(agents) == 2 and not job.get("audience") and not job.get("rebuttals"):
+                record["turns"] = run_debate_turns(agents[0], agents[1], job["topic"], **settings)
+            else:
+                record["turns"] = run_panel_turns(
+                    agents, job["topic"],
+                    scheduler=make_scheduler(job.get("scheduler", "round-robin"), agents),
+                    rebuttals=job.get("rebuttals", False),
+                    audience=self.build_agents(job, "audience"),
+                    max_parallel=max(len(agents), len(job.get("audience", []))),
+                    **settings,
+                )
+            if memory is not None:
+                record["memory_summary"] = memory.summary
+            if judge is not None:
+                judge.flush(timeout=120)
+                record["judgements"] = judge.results
+                record["scores"] = {name: sum(result["points"] for result in judge.results
+                                              if result["agent"] == name) for name in record["agents"]}
+            failed_turns = [turn for turn in record["turns"] if turn["error"]]
+            record["error"] = failed_turns[-1]["error"] if failed_turns else None
+        except Exception as e:
+            record["turns"] = record.get("turns", [])
+            record["error"] = str(e)
+        finally:
+            # A failed job must not leave the summary executor or the judge thread running
+            if memory is not None:
+                memory.close()
+            if judge is not None:
+                judge.close()
+        record["started_at"] = started_at
+        record["elapsed"] = round(time.time() - started_at, 3)
+        if profiler.get_tracer().enabled:
+            profiler.get_tracer().complete("debate", "debate", span_start, time.perf_counter(),
+                                           {"topic": job["topic"], "error": record["error"]})
+        self.write(record)
+        return record
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._write_lock:
+            with open(self.out_path, "a", encoding="utf-8") as f:
+                f.write(line)
+            if record["error"]:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def run(self, jobs):
+        """Run every job; returns the list of transcript records in completion order"""
+        records = []
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="debate") as pool:
+            futures = [pool.submit(self.run_job, index, job) for index, job in enumerate(jobs)]
+            try:
+                for future in as_completed(futures):
+                    record = future.result()
+                    records.append(record)
+                    status = f"error: {record['error']}" if record["error"] else f"{len(record['turns'])} turns"
+                    print(f"[{len(records)}/{len(jobs)}] {record['topic']} ({status}, {record['elapsed']:.1f}s)")
+            except KeyboardInterrupt:
+                print("Stopping: aborting in-flight turns...")
+                self.stop_event.cancel("interrupted")
+                for future in futures:
+                    future.cancel()
+                raise
+        elapsed = time.time() - started
+        print(f"Finished {self.completed} debate(s), {self.failed} failed, in {elapsed:.1f}s "
+              f"({len(records) / elapsed * 3600 if elapsed else 0:.0f} debates/hour)")
+        loads = [turn["load_ms"] for record in records for turn in record["turns"]]
+        print(f"Model swaps: {sum(load >= SWAP_LOAD_MS for load in loads)} turn(s) waited for a model load, "
+              f"{sum(loads) / 1000:.1f}s loading in total")
+        if self.model_scheduler is not None:
+            stats = self.model_scheduler.stats()
+            print(f"Model scheduler: {stats['swaps']} swap(s) over {stats['turns']} request(s), "
+                  f"{stats['avg_wait_ms']:.0f} ms average wait")
+        return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run debates in bulk without the GUI")
+    parser.add_argument("jobs", help="JSON or JSONL file of debates (topic + agent pair)")
+    parser.add_argument("--out", default="transcripts.jsonl", help="JSONL file to append transcripts to")
+    parser.add_argument("--workers", type=int, default=4, help="debates to run at once")
+    parser.add_argument("--rounds", type=int, default=4, help="turns after the opening statements")
+    parser.add_argument("--model", help="override every agent's model")
+    parser.add_argument("--host", action="append", dest="hosts",
+                        help=f"Ollama base URL (default {DEFAULT_BASE_URL}); repeat to balance over several hosts")
+    parser.add_argument("--web-research", action="store_true", help="enable web research for every turn")
+    parser.add_argument("--research-db", help="SQLite file for the research cache")
+    parser.add_argument("--research-backend", choices=RESEARCH_BACKENDS, default="web",
+                        help="search the web or a local document index (see local_index.py)")
+    parser.add_argument("--research-index", help="directory of the local research index")
+    parser.add_argument("--research-docs", help="directory of documents to add to the local index first")
+    parser.add_argument("--metrics", help="JSONL file to append per-turn latency records to")
+    parser.add_argument("--memory-budget", type=int, default=0,
+                        help="token budget for the rolling debate memory (0: previous turn only)")
+    parser.add_argument("--summary-model", help="model for debate memory summaries (default: the first agent's)")
+    parser.add_argument("--judge", action="store_true", help="rate and summarize every turn")
+    parser.add_argument("--judge-model", help="model for the judge (default: the first agent's)")
+    parser.add_argument("--trace", help="record a Chrome trace of the run to this file")
+    parser.add_argument("--sample-stacks", action="store_true", help="add sampled Python stacks to the trace")
+    parser.add_argument("--response-cache", help="SQLite file of recorded model responses")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="record",
+                        help="record responses, replay them without Ollama, or bypass the cache")
+    parser.add_argument("--replay-delay", choices=("original", "none"), default="original",
+                        help="replay with the recorded chunk timing or as fast as possible")
+    parser.add_argument("--keep-alive", default="30m",
+                        help="how long Ollama keeps each model loaded after use (Ollama duration, e.g. 30m or -1)")
+    parser.add_argument("--no-warm-up", action="store_true", help="don't load the jobs' models before starting")
+    parser.add_argument("--max-loaded-models", type=int, default=0,
+                        help="models the host keeps loaded at once; groups turns by model to limit swaps (0: off)")
+    args = parser.parse_args()
+
+    debates, extra_personas = load_jobs(args.jobs)
+    tracer = profiler.enable(sample_stacks=args.sample_stacks) if args.trace else None
+    research_cache = (make_research_cache(args.research_backend, args.research_db, args.research_index,
+                                          args.research_docs) if args.web_research else None)
+    ollama = make_client(args.hosts, pool_maxsize=max(16, args.workers))
+    if hasattr(ollama, "start_health_checks"):
+        ollama.start_health_checks()
+    client = wrap_client(ollama, args.response_cache, args.cache_mode, args.replay_delay)
+    runner = BatchRunner(
+        args.out,
+        workers=args.workers,
+        rounds=args.rounds,
+        client=client,
+        research_cache=research_cache,
+        web_research=args.web_research,
+        model=args.model,
+        extra_personas=extra_personas,
+        metrics_sink=JSONLSink(args.metrics) if args.metrics else None,
+        memory_budget=args.memory_budget,
+        judge=args.judge,
+        judge_model=args.judge_model,
+        summary_model=args.summary_model,
+        keep_alive=args.keep_alive,
+        model_scheduler=ModelSwapScheduler(args.max_loaded_models) if args.max_loaded_models else None,
+    )
+    if not args.no_warm_up and args.cache_mode != "replay":
+        extra_models = [model for model in (args.judge_model, args.summary_model) if model]
+        warm_up(ollama, runner.job_models(debates) + extra_models, args.keep_alive)
+    try:
+        runner.run(debates)
+    finally:
+        if args.response_cache:
+            print(f"Response cache: {client.stats()}" if hasattr(client, "stats") else "Response cache bypassed")
+        if tracer is not None:
+            tracer.stop()
+            tracer.write(args.trace)
+            print(f"Trace written to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
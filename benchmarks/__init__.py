@@ -0,0 +1,4 @@
+"""Benchmarks for the debate runtime. Run them as modules from the repo root, e.g.
+
+    python -m benchmarks.stream_decoder
+"""
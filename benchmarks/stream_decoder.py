@@ -0,0 +1,124 @@
+"""Replay recorded NDJSON streams through the legacy and the incremental decoders
+
+Recordings are raw response bodies as Ollama sends them (one JSON object per
+line). Without arguments a synthetic recording of `--tokens` tokens is used.
+"""
+import argparse
+import json
+import random
+import time
+
+from stream_decoder import JSON_BACKEND, NDJSONStreamDecoder
+
+
+def synthetic_recording(tokens=2000, seed=0):
+    rng = random.Random(seed)
+    words = ["the", " model", " argues", " that", " evidence", ",", " however", " data", ".", " we"]
+    lines = [json.dumps({"model": "bench", "created_at": "2025-01-01T00:00:00Z",
+                         "response": rng.choice(words), "done": False})
+             for _ in range(tokens)]
+    lines.append(json.dumps({"model": "bench", "response": "", "done": True,
+                             "context": list(range(512)), "eval_count": tokens}))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def split_blocks(raw, block_size):
+    return [raw[i:i + block_size] for i in range(0, len(raw), block_size)]
+
+
+def iter_lines(blocks):
+    """Line splitting as done by requests' Response.iter_lines"""
+    pending = None
+    for chunk in blocks:
+        if pending is not None:
+            chunk = pending + chunk
+        lines = chunk.split(b"\n")
+        if lines and lines[-1] and chunk and lines[-1][-1] == chunk[-1]:
+            pending = lines.pop()
+        else:
+            pending = None
+        yield from lines
+    if pending is not None:
+        yield pending
+
+
+def legacy_decode(blocks):
+    """The original iter_lines + stream_to_callback loop: str decode, json.loads, string concat"""
+    full_response = ""
+    for chunk in iter_lines(blocks):
+        if chunk:
+            content = json.loads(chunk.decode('utf-8'))
+            delta = content.get('response')
+            if delta and delta.strip():
+                full_response += delta
+    return full_response
+
+
+def incremental_decode(blocks, loads=None):
+    decoder = NDJSONStreamDecoder(loads=loads)
+    for _ in decoder.iter_stream(blocks):
+        pass
+    return decoder.text
+
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(recordings, block_size=512, repeat=5):
+    results = []
+    for name, raw in recordings:
+        blocks = split_blocks(raw, block_size)
+        tokens = raw.count(b"\n")
+        cases = {
+            "legacy_iter_lines": lambda: legacy_decode(blocks),
+            "incremental_json": lambda: incremental_decode(blocks, loads=json.loads),
+        }
+        if JSON_BACKEND != "json":
+            cases[f"incremental_{JSON_BACKEND}"] = lambda: incremental_decode(blocks)
+        for case, func in cases.items():
+            seconds = best_of(func, repeat)
+            results.append({
+                "recording": name,
+                "case": case,
+                "tokens": tokens,
+                "bytes": len(raw),
+                "seconds": seconds,
+                "us_per_chunk": seconds / max(tokens, 1) * 1e6,
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("recordings", nargs="*", help="raw NDJSON stream recordings")
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--block-size", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    if args.recordings:
+        recordings = []
+        for path in args.recordings:
+            with open(path, "rb") as f:
+                recordings.append((path, f.read()))
+    else:
+        recordings = [(f"synthetic-{args.tokens}", synthetic_recording(args.tokens))]
+
+    results = run(recordings, args.block_size, args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(f"{r['recording']:<24} {r['case']:<20} {r['seconds'] * 1000:8.2f} ms "
+              f"{r['us_per_chunk']:6.2f} us/chunk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""Benchmark suite for the generation path, run against the bundled mock Ollama server
+
+    python -m benchmarks.suite --out bench_results.json
+    python -m benchmarks.suite --compare bench_results.json
+
+Benchmarks:
+- turn_latency: end-to-end AIAgent.respond_to latency, with and without context reuse
+- stream_decoding: decoder overhead on a replayed stream (see benchmarks.stream_decoder)
+- gui_render: RenderQueue flush throughput into a Tk text widget (skipped without a display)
+- concurrency: batch runner throughput as the number of concurrent debates grows
+- multi_host: batch runner throughput on one mock host versus a BackendPool of three,
+  and with one of the three down
+- model_swaps: concurrent debates whose agents use two models on a host that keeps one
+  loaded, with and without model_scheduler.ModelSwapScheduler (medians over repeats)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from ai_agent import AIAgent
+from backend_pool import BackendPool
+from batch_runner import BatchRunner
+from debate_engine import build_debate_context, round_note
+from mock_ollama import MockOllamaServer
+from model_scheduler import ModelSwapScheduler, warm_up
+from ollama_client import OllamaClient
+from personas import PERSONAS
+from benchmarks import stream_decoder
+
+MODEL = "dolphin-mixtral:latest"
+STAGGER = 0.1
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def quiet():
+    """Swallow the agents' progress prints while timing"""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def make_pair(client):
+    agent1 = AIAgent("Bench Pro", 30, "Researcher", ["precise"], "Benchmark persona.", model=MODEL, client=client)
+    agent2 = AIAgent("Bench Con", 31, "Engineer", ["skeptical"], "Benchmark persona.", model=MODEL,
+                     default_stance="con", client=client)
+    return agent1, agent2
+
+
+def bench_turn_latency(turns=12, tokens=40, tps=400.0, ttft=0.02):
+    results = {}
+    with MockOllamaServer(ttft=ttft, tokens_per_second=tps, response_tokens=tokens,
+                          prompt_eval_per_token=0.0005) as server:
+        client = OllamaClient(server.url)
+        for reuse in (False, True):
+            agent1, agent2 = make_pair(client)
+            agent1.set_context_reuse(reuse)
+            context = build_debate_context("benchmarking")
+            latencies = []
+            prompt_eval_ms = []
+            message = "Opening statement."
+            with quiet():
+                for turn in range(turns):
+                    started = time.perf_counter()
+                    message = agent1.respond_to(message, agent2, context, turn_note=round_note(turn + 1))
+                    latencies.append(time.perf_counter() - started)
+                    prompt_eval_ms.append(agent1.last_stats["prompt_eval_duration"] / 1e6)
+            key = "context_reuse" if reuse else "full_prompt"
+            results[key] = {
+                "turns": turns,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "mean_prompt_eval_ms": statistics.mean(prompt_eval_ms),
+            }
+        results["pool"] = client.pool_stats()
+    return results
+
+
+def bench_stream_decoding(tokens=5000):
+    recording = [(f"synthetic-{tokens}", stream_decoder.synthetic_recording(tokens))]
+    return stream_decoder.run(recording, block_size=512, repeat=5)
+
+
+def bench_gui_render(tokens=5000):
+    try:
+        import tkinter as tk
+        from tkinter import scrolledtext
+        root = tk.Tk()
+    except Exception as e:
+        return {"skipped": f"no display ({e.__class__.__name__})"}
+
+    from render_queue import RenderQueue
+    root.withdraw()
+    results = {}
+    try:
+        # Per-token inserts, as stream_response used to do
+        text = scrolledtext.ScrolledText(root)
+        started = time.perf_counter()
+        for _ in range(tokens):
+            text.insert(tk.END, " token")
+            text.update()
+        per_token = time.perf_counter() - started
+        results["per_token_insert"] = {"tokens": tokens, "tokens_per_sec": tokens / per_token}
+
+        # Batched flushes through the render queue
+        text = scrolledtext.ScrolledText(root)
+
+        def render(segments):
+            for kind, name, chunk in segments:
+                if kind == "delta":
+                    text.insert(tk.END, chunk)
+            text.see(tk.END)
+
+        queue = RenderQueue(root, render)
+        started = time.perf_counter()
+        for i in range(tokens):
+            queue.push_delta("bench", " token")
+            if i % 50 == 49:  # roughly one 40 ms frame at ~1200 tokens/sec
+                queue.flush()
+                root.update_idletasks()
+        queue.flush()
+        batched = time.perf_counter() - started
+        results["render_queue"] = {"tokens": tokens, "tokens_per_sec": tokens / batched,
+                                   "avg_tokens_per_flush": queue.stats()["avg_tokens_per_flush"]}
+    finally:
+        root.destroy()
+    return results
+
+
+def bench_concurrency(levels=(1, 2, 4, 8), debates=8, rounds=2, tps=200.0, ttft=0.02):
+    results = []
+    with MockOllamaServer(ttft=ttft, tokens_per_second=tps, response_tokens=20) as server:
+        for workers in levels:
+            client = OllamaClient(server.url, pool_maxsize=max(16, workers))
+            jobs = [{"topic": f"scaling {i}", "agents": ["jamal_carter", "andrew_wallace"]} for i in range(debates)]
+            with tempfile.TemporaryDirectory() as tmp:
+                runner = BatchRunner(os.path.join(tmp, "out.jsonl"), workers=workers, rounds=rounds,
+                                     client=client, model=MODEL)
+                started = time.perf_counter()
+                with quiet():
+                    runner.run(jobs)
+                elapsed = time.perf_counter() - started
+            results.append({
+                "workers": workers,
+                "debates": debates,
+                "seconds": elapsed,
+                "debates_per_min": debates / elapsed * 60,
+                "failed": runner.failed,
+            })
+    return results
+
+
+def bench_multi_host(debates=8, workers=8, rounds=2, tps=100.0, ttft=0.02):
+    # Each mock host serves one generation at a time, like a single-GPU Ollama box
+    servers = [MockOllamaServer(ttft=ttft, tokens_per_second=tps, response_tokens=20, num_parallel=1).start()
+               for _ in range(3)]
+    results = []
+    try:
+        dead = MockOllamaServer()
+        dead_url = dead.url
+        dead.httpd.server_close()  # nothing listens there any more
+        cases = [
+            ("single", [servers[0].url]),
+            ("pool3", [server.url for server in servers]),
+            ("pool3_one_down", [servers[0].url, servers[1].url, dead_url]),
+        ]
+        for case, urls in cases:
+            client = BackendPool(urls, pool_maxsize=max(16, workers)) if len(urls) > 1 else OllamaClient(urls[0])
+            jobs = [{"topic": f"hosts {i}", "agents": ["jamal_carter", "andrew_wallace"]} for i in range(debates)]
+            with tempfile.TemporaryDirectory() as tmp:
+                runner = BatchRunner(os.path.join(tmp, "out.jsonl"), workers=workers, rounds=rounds,
+                                     client=client, model=MODEL)
+                started = time.perf_counter()
+                with quiet():
+                    runner.run(jobs)
+                elapsed = time.perf_counter() - started
+            stats = client.pool_stats()
+            results.append({
+                "case": case,
+                "hosts": len(urls),
+                "seconds": elapsed,
+                "debates_per_min": debates / elapsed * 60,
+                "failed": runner.failed,
+                "failovers": stats.get("failovers", 0),
+            })
+            client.close()
+    finally:
+        for server in servers:
+            server.stop()
+    return results
+
+
+class StaggeredRunner(BatchRunner):
+    """Starts job i after i * `stagger` seconds, like debates started one after another"""
+
+    def __init__(self, *args, stagger=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stagger = stagger
+
+    def run_job(self, index, job):
+        time.sleep(index * self.stagger)
+        return super().run_job(index, job)
+
+
+def bench_model_swaps(debates=6, workers=6, rounds=4, load_time=0.3, tps=400.0, ttft=0.02, repeats=3,
+                      stagger=STAGGER):
+    """Medians over `repeats` runs per case
+
+    Debates that start together stay in step and group their turns by model
+    on their own, so they start `stagger` seconds apart, as they would when
+    submitted one by one.
+    """
+    personas = {
+        "first": dict(PERSONAS["jamal_carter"], model="mock-a"),
+        "second": dict(PERSONAS["andrew_wallace"], model="mock-b"),
+    }
+    # Varying lengths keep the debates from running in lock-step, which would group turns anyway
+    jobs = [{"topic": f"swaps {i}", "agents": ["first", "second"], "budget": {"num_predict": 8 + 5 * i}}
+            for i in range(debates)]
+    results = []
+    for case in ("unscheduled", "grouped"):
+        runs = []
+        for _ in range(repeats):
+            scheduler = ModelSwapScheduler(max_loaded_models=1) if case == "grouped" else None
+            # Ollama admits requests in arrival order and swaps only idle models, four generations at a time
+            with MockOllamaServer(models=["mock-a", "mock-b"], load_time=load_time, max_loaded_models=1,
+                                  ttft=ttft, tokens_per_second=tps, response_tokens=40, num_parallel=4) as server:
+                client = OllamaClient(server.url)
+                with tempfile.TemporaryDirectory() as tmp:
+                    runner = StaggeredRunner(os.path.join(tmp, "out.jsonl"), workers=workers, rounds=rounds,
+                                             client=client, extra_personas=personas, model_scheduler=scheduler,
+                                             stagger=stagger)
+                    with quiet():
+                        warm_up(client, runner.job_models(jobs))
+                        started = time.perf_counter()
+                        records = runner.run(jobs)
+                    elapsed = time.perf_counter() - started
+                loads = [turn["load_ms"] for record in records for turn in record["turns"]]
+                runs.append({
+                    "seconds": elapsed,
+                    "swaps": server.stats.get("loads", 0) - 2,  # minus the two warm-up loads
+                    "load_seconds": sum(loads) / 1000,
+                    "failed": runner.failed,
+                })
+                client.close()
+        swaps = [run["swaps"] for run in runs]
+        results.append({
+            "case": case,
+            "repeats": repeats,
+            "seconds": statistics.median(run["seconds"] for run in runs),
+            "swaps": statistics.median(swaps),
+            "swaps_min": min(swaps),
+            "swaps_max": max(swaps),
+            "load_seconds": statistics.median(run["load_seconds"] for run in runs),
+            "failed": sum(run["failed"] for run in runs),
+        })
+    return results
+
+
+BENCHMARKS = {
+    "turn_latency": bench_turn_latency,
+    "stream_decoding": bench_stream_decoding,
+    "gui_render": bench_gui_render,
+    "concurrency": bench_concurrency,
+    "multi_host": bench_multi_host,
+    "model_swaps": bench_model_swaps,
+}
+
+
+def flatten(prefix, value, out):
+    """Flatten nested results into {"a.b.c": number} for comparisons"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten(f"{prefix}.{key}" if prefix else key, item, out)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = item.get("case") or item.get("workers") if isinstance(item, dict) else index
+            flatten(f"{prefix}[{label}]", item, out)
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        out[prefix] = value
+    return out
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = flatten("", baseline["results"], {})
+    new = flatten("", current["results"], {})
+    for key in sorted(set(old) & set(new)):
+        if old[key]:
+            change = (new[key] - old[key]) / abs(old[key]) * 100
+            print(f"{key:<60} {old[key]:>12.3f} -> {new[key]:>12.3f} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--out", help="write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="print changes against a previous results file")
+    args = parser.parse_args()
+
+    names = args.only or list(BENCHMARKS)
+    results = {}
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = BENCHMARKS[name]()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": stream_decoder.JSON_BACKEND,
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        compare(report, args.compare)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
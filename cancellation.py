@@ -0,0 +1,74 @@
+import threading
+
+
+class CancelToken:
+    """Cooperative cancellation shared by a debate's turns, research and pacing
+
+    It behaves like a threading.Event (set/is_set/wait/clear), so it can be
+    passed anywhere a stop event is expected. On top of that, work in flight
+    registers cleanup with `on_cancel` (e.g. closing an HTTP stream) so
+    cancelling interrupts it immediately instead of at the next check.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = {}
+        self._next_id = 0
+        self.reason = ""
+        self.tokens_saved = 0  # estimated tokens the model did not have to generate
+        self.aborted_streams = 0
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def cancel(self, reason=""):
+        """Cancel and run every registered callback once"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancel callback failed: {e}")
+
+    set = cancel
+
+    def clear(self):
+        """Re-arm the token for the next debate and reset its counters"""
+        with self._lock:
+            self._event.clear()
+            self.reason = ""
+            self.tokens_saved = 0
+            self.aborted_streams = 0
+
+    def on_cancel(self, callback):
+        """Call `callback` when cancelled (now, if already cancelled); returns a handle for `remove`"""
+        with self._lock:
+            if not self._event.is_set():
+                self._next_id += 1
+                self._callbacks[self._next_id] = callback
+                return self._next_id
+        callback()
+        return None
+
+    def remove(self, handle):
+        with self._lock:
+            self._callbacks.pop(handle, None)
+
+    def record_abort(self, tokens_saved):
+        with self._lock:
+            self.aborted_streams += 1
+            self.tokens_saved += tokens_saved
@@ -0,0 +1,222 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import profiler
+from cancellation import CancelToken
+from turn_scheduler import RoundRobinScheduler
+
+# Format guidance for each interaction mode, shared by the GUI and headless runners
+FORMAT_POINTS = {
+    'collaborative discussion': [
+        "Draw from their unique expertise and perspective",
+        "Support arguments with relevant examples and build on each other's points",
+        "Maintain professional discourse while staying true to their personality",
+        "Work together to find comprehensive answers",
+        "Keep responses focused and concise (2-3 paragraphs)"
+    ],
+    'debate': [
+        "Draw from their unique expertise and perspective",
+        "Support arguments with relevant examples",
+        "Maintain professional discourse while staying true to their personality",
+        "Consider and respond to the other's viewpoints thoughtfully",
+        "Keep responses focused and concise (2-3 paragraphs)"
+    ]
+}
+
+
+def build_debate_context(topic, mode_type="debate"):
+    """The debate framing every participant sees; mode_type is 'debate' or 'collaborative discussion'"""
+    points = FORMAT_POINTS[mode_type]
+    return f"""This is an intellectual {mode_type} on the topic: {topic}
+        
+Format: This is a {'collaborative' if mode_type == 'collaborative discussion' else 'respectful academic'} discussion between two experts. Each participant should:
+- {points[0]}
+- {points[1]}
+- {points[2]}
+- {points[3]}
+- {points[4]}"""
+
+
+def opening_statement_prompt(topic):
+    return f"Make your opening statement on why your position on {topic} is correct. Be focused and persuasive."
+
+
+def round_note(round_number):
+    """Per-turn note for round `round_number` (1-based)"""
+    return f"This is round {round_number} of the discussion. Consider previous points raised and develop the conversation further."
+
+
+def reaction_note():
+    return "You are in the audience. React to the last statement in one short sentence, in character."
+
+
+def panel_message(name, text):
+    """A previous turn quoted for a panel, where the speaker is not implied"""
+    return f"{name}: {text}"
+
+
+def memory_note(note, memory):
+    """Append the debate memory (see debate_memory.DebateMemory) to a turn note"""
+    if memory is None:
+        return note
+    remembered = memory.render(skip_latest=True)
+    if not remembered:
+        return note
+    return f"{note}\n\n{remembered}" if note else remembered
+
+
+def run_debate_turns(agent1, agent2, topic, rounds, debate_context=None, callback=None,
+                     web_research=False, pacing=None, stop_event=None, memory=None, on_turn=None):
+    """Run opening statements plus `rounds` alternating turns; returns the list of turns
+
+    This is the headless equivalent of DebateGUI.run_debate with a fixed length.
+    If `stop_event` is a cancellation.CancelToken, setting it also aborts the
+    turn in progress. With a `memory`, each speaker also sees a bounded
+    summary of the turns before the one it is answering. `on_turn(turn)` is
+    called as each turn is recorded, e.g. to hand it to a judge.TurnJudge.
+    """
+    cancel_token = stop_event if isinstance(stop_event, CancelToken) else None
+    debate_context = debate_context or build_debate_context(topic)
+    turns = []
+
+    def take_turn(agent, other, message, label, note=""):
+        started = time.perf_counter()
+        response = agent.respond_to(message, other, debate_context, callback=callback,
+                                    web_research=web_research, turn_note=memory_note(note, memory),
+                                    cancel_token=cancel_token)
+        if memory is not None and not agent.last_error:
+            memory.add_turn(agent.name, response)
+        turns.append({
+            "round": label,
+            "agent": agent.name,
+            "response": response,
+            "error": agent.last_error,
+            "tokens": (agent.last_metrics or {}).get("tokens", 0),
+            "load_ms": round((agent.last_metrics or {}).get("load_ms", 0.0), 1),
+            "seconds": round(time.perf_counter() - started, 3),
+        })
+        if on_turn is not None:
+            on_turn(turns[-1])
+        return response
+
+    def keep_going(previous):
+        if stop_event is not None and stop_event.is_set():
+            return False
+        if pacing is None:
+            return True
+        with profiler.span("pacing.wait", cat="pacing"):
+            return pacing.wait(previous, stop_event)
+
+    # Opening statements
+    last_response = take_turn(agent1, agent2, opening_statement_prompt(topic), "opening")
+    if not keep_going(last_response):
+        return turns
+    last_response = take_turn(agent2, agent1, last_response, "opening")
+
+    current_agent, other_agent = agent1, agent2
+    for round_number in range(1, rounds + 1):
+        if not keep_going(last_response):
+            break
+        last_response = take_turn(current_agent, other_agent, last_response,
+                                  round_number, round_note(round_number))
+        current_agent, other_agent = other_agent, current_agent
+    return turns
+
+
+def run_panel_turns(agents, topic, rounds, scheduler=None, debate_context=None, callback=None,
+                    web_research=False, pacing=None, stop_event=None, memory=None,
+                    rebuttals=False, audience=(), max_parallel=4, on_turn=None):
+    """Run a debate between any number of agents; returns the list of turns
+
+    Opening statements don't depend on each other and are generated
+    concurrently. Then `scheduler` (round-robin by default, see
+    turn_scheduler) picks each round's speaker, who answers the latest turn.
+    With `rebuttals`, everyone else then answers that speaker at once. Each
+    `audience` agent reacts to every turn in parallel; reactions are
+    recorded but do not steer the debate. Concurrent turns must come from
+    different agents, since an agent holds per-turn state. `on_turn` is
+    called for each turn as in run_debate_turns.
+    """
+    agents = list(agents)
+    scheduler = scheduler or RoundRobinScheduler(agents)
+    cancel_token = stop_event if isinstance(stop_event, CancelToken) else None
+    debate_context = debate_context or build_debate_context(topic)
+    turns = []
+    history = []  # (name, text) of debate turns, for the scheduler
+    lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix="panel-turn")
+
+    def take_turn(agent, message, label, note="", others=None):
+        started = time.perf_counter()
+        response = agent.respond_to(message, others if others is not None else scheduler.others(agent),
+                                    debate_context, callback=callback, web_research=web_research,
+                                    turn_note=memory_note(note, memory), cancel_token=cancel_token)
+        return {
+            "round": label,
+            "agent": agent.name,
+            "response": response,
+            "error": agent.last_error,
+            "tokens": (agent.last_metrics or {}).get("tokens", 0),
+            "load_ms": round((agent.last_metrics or {}).get("load_ms", 0.0), 1),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+
+    def take_turns(calls):
+        """Run independent turns at once; results are recorded in call order"""
+        if len(calls) == 1:
+            results = [take_turn(*calls[0])]
+        else:
+            results = list(executor.map(lambda call: take_turn(*call), calls))
+        with lock:
+            turns.extend(results)
+        if on_turn is not None:
+            for turn in results:
+                on_turn(turn)
+        return results
+
+    def record(results):
+        for turn in results:
+            if turn["error"]:
+                continue
+            history.append((turn["agent"], turn["response"]))
+            if memory is not None:
+                memory.add_turn(turn["agent"], turn["response"])
+
+    def react(results):
+        if audience:
+            latest = [turn for turn in results if not turn["error"]]
+            if latest:
+                message = panel_message(latest[-1]["agent"], latest[-1]["response"])
+                take_turns([(member, message, "reaction", reaction_note(), agents) for member in audience])
+
+    def keep_going(previous):
+        if stop_event is not None and stop_event.is_set():
+            return False
+        if pacing is None:
+            return True
+        with profiler.span("pacing.wait", cat="pacing"):
+            return pacing.wait(previous, stop_event)
+
+    try:
+        # Opening statements
+        results = take_turns([(agent, opening_statement_prompt(topic), "opening") for agent in agents])
+        record(results)
+        react(results)
+
+        for round_number in range(1, rounds + 1):
+            if not history or not keep_going(history[-1][1]):
+                break
+            speaker = scheduler.next_speaker(history)
+            message = panel_message(*history[-1])
+            results = take_turns([(speaker, message, round_number, round_note(round_number))])
+            record(results)
+            if rebuttals and not results[0]["error"] and keep_going(results[0]["response"]):
+                rebuttal = panel_message(speaker.name, results[0]["response"])
+                results += take_turns([(agent, rebuttal, f"{round_number}-rebuttal", round_note(round_number))
+                                       for agent in agents if agent is not speaker])
+                record(results[1:])
+            react(results)
+    finally:
+        executor.shutdown(wait=False)
+    return turns
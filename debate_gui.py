@@ -1,22 +1,70 @@
 import tkinter as tk
-from tkinter import ttk, scrolledtext
-from ai_agent import AIAgent
+from tkinter import ttk, scrolledtext, filedialog
+from debate_engine import build_debate_context, memory_note, opening_statement_prompt, panel_message, round_note
+from debate_memory import DebateMemory, ModelSummarizer
+from judge import TurnJudge
+from session_store import SessionStore, load_session, replay_events
+from turn_scheduler import SCHEDULERS, make_scheduler
+from personas import PERSONAS, make_agent
+from backend_pool import make_client
+from ollama_client import DEFAULT_BASE_URL, OllamaClient
+from response_cache import CACHE_MODES, wrap_client
+from research import RESEARCH_BACKENDS, ResearchCache, ResearchPrefetcher, make_research_cache
 from settings_manager import SettingsManager
+from render_queue import RenderQueue
+from transcript_archive import TranscriptArchive
+from pacing import PacingPolicy
+from cancellation import CancelToken
+import profiler
+from model_scheduler import warm_up
+from metrics import InMemorySink, JSONLSink, MultiSink, PrometheusSink, render_record
+import argparse
 import threading
-import time
 
 class DebateGUI:
-    def __init__(self, root):
+    def __init__(self, root, max_chat_lines=2000, max_history_turns=50, archive_dir="debate_archives",
+                 metrics_path=None, prometheus_port=None, trace_path=None, sample_stacks=False,
+                 session_dir="debate_sessions"):
         self.root = root
         self.root.title("AI Debate Simulator")
         
+        # Profiling mode: spans from every thread are written as a Chrome trace on close
+        self.trace_path = trace_path
+        if trace_path:
+            profiler.enable(sample_stacks=sample_stacks)
+        
+        # Per-turn latency records; optionally also appended to JSONL and served to Prometheus
+        self.metrics = InMemorySink()
+        sinks = [self.metrics]
+        if metrics_path:
+            sinks.append(JSONLSink(metrics_path))
+        if prometheus_port:
+            self.prometheus = PrometheusSink()
+            self.prometheus.serve(prometheus_port)
+            sinks.append(self.prometheus)
+        self.metrics_sink = MultiSink(*sinks)
+        
+        # Scrollback limits; older chat text and agent history spill to disk
+        self.max_chat_lines = max_chat_lines
+        self.max_history_turns = max_history_turns
+        self.chat_archive = TranscriptArchive.for_session(archive_dir, "chat")
+        self.history_archive = TranscriptArchive.for_session(archive_dir, "history")
+        self.paged_from = 0  # index of the oldest archived chunk shown in the chat area
+        self.paged_line_counts = []  # line counts of archived chunks paged back in at the top
+        
+        # Every debate is logged to a session file so it can be resumed or replayed
+        self.session_dir = session_dir
+        self.session = None
+        
         # Create main windows
         self.create_chat_window()
         self.create_summary_window()
         
-        # Initialize agents
+        # Initialize agents; extra panelists join the two main speakers
         self.agent1 = None
         self.agent2 = None
+        self.extra_agents = []
+        self.scheduler_name = "round-robin"  # see turn_scheduler.SCHEDULERS
         
         # Settings manager
         self.settings_manager = None
@@ -36,6 +84,16 @@ class DebateGUI:
         self.is_debating = False
         self.current_responses = {}
         self.debate_thread = None  # Track the debate thread
+        self.memory = None  # Rolling transcript memory of the current debate
+        self.memory_budget = 0  # Tokens of earlier turns shown to each speaker; 0 disables
+        self.judge = None  # Rates and summarizes turns of the current debate
+        self.judge_model = None  # Defaults to the first agent's model
+        self.summary_model = None  # Model for debate memory summaries, defaults to the first agent's
+        self.generation_idle = threading.Event()  # Set between turns, when the judge may use the backend
+        self.generation_idle.set()
+        self.turn_label = None
+        self.stop_event = CancelToken()  # Stop aborts the model stream, research and pacing waits at once
+        self.pacing = PacingPolicy.fixed(2.0)  # Used until the settings window picks another policy
         self.gui_alive = True  # Track if GUI is still active
         
         # Bind window close events
@@ -50,6 +108,13 @@ class DebateGUI:
         
         self.chat_area = scrolledtext.ScrolledText(self.chat_window, wrap=tk.WORD, height=40, font=("Consolas", 10))
         self.chat_area.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        self.chat_area.configure(yscrollcommand=self.on_chat_yscroll)
+        
+        # Streamed tokens are batched and flushed to the chat area at a fixed frame rate
+        self.render_stats_label = ttk.Label(self.chat_window, text="")
+        self.render_stats_label.pack(padx=10, pady=(0, 5), anchor=tk.E)
+        self.render_queue = RenderQueue(self.root, self.render_segments, interval_ms=40)
+        self.render_queue.start()
 
     def create_summary_window(self):
         self.summary_window = tk.Toplevel(self.root)
@@ -58,6 +123,25 @@ class DebateGUI:
         
         self.summary_area = scrolledtext.ScrolledText(self.summary_window, wrap=tk.WORD, height=40, font=("Consolas", 10))
         self.summary_area.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
+        
+        # Live generation speed of each agent, refreshed while the GUI runs
+        self.speed_label = ttk.Label(self.summary_window, text="", font=("Consolas", 10))
+        self.speed_label.pack(padx=10, pady=(0, 10), anchor=tk.W)
+        self.root.after(500, self.update_speed_label)
+
+    def update_speed_label(self):
+        """Show each agent's current tokens/sec in the summary window"""
+        if not self.gui_alive:
+            return
+        try:
+            if self.agent1 and self.agent2:
+                self.speed_label.config(text="\n".join(
+                    f"{agent.name}: {agent.current_tokens_per_sec():.1f} tok/s"
+                    for agent in self.panel()
+                ))
+            self.root.after(500, self.update_speed_label)
+        except tk.TclError:
+            self.gui_alive = False
 
     def create_debate_controls(self):
         # Top control frame for topic and buttons
@@ -85,6 +169,16 @@ class DebateGUI:
         self.clear_button = ttk.Button(control_frame, text="Clear Debate", command=self.clear_debate)
         self.clear_button.pack(side=tk.LEFT, padx=5)
         
+        # Session controls: continue a saved debate or watch it again
+        session_frame = ttk.Frame(self.root)
+        session_frame.pack(padx=10, pady=(0, 5), fill=tk.X)
+        ttk.Button(session_frame, text="Resume Session...", command=self.resume_session).pack(side=tk.LEFT, padx=5)
+        ttk.Button(session_frame, text="Replay Session...", command=self.replay_session).pack(side=tk.LEFT, padx=5)
+        ttk.Label(session_frame, text="Replay speed:").pack(side=tk.LEFT, padx=(10, 0))
+        self.replay_speed = tk.StringVar(value="1x")
+        ttk.Combobox(session_frame, textvariable=self.replay_speed, state="readonly", width=8,
+                     values=["1x", "2x", "4x", "10x", "Instant"]).pack(side=tk.LEFT, padx=5)
+        
         # Score frame for tracking points
         score_frame = ttk.Frame(self.root)
         score_frame.pack(padx=10, pady=5, fill=tk.X)
@@ -109,10 +203,21 @@ class DebateGUI:
         ttk.Button(agent2_frame, text="+1", command=lambda: self.update_score(2, 1)).pack(side=tk.LEFT, padx=2)
         ttk.Button(agent2_frame, text="-1", command=lambda: self.update_score(2, -1)).pack(side=tk.LEFT, padx=2)
         
+        # A model judge rates each turn in the background and adjusts the scores
+        self.auto_judge = tk.BooleanVar(value=False)
+        ttk.Checkbutton(score_frame, text="Auto judge", variable=self.auto_judge).pack(side=tk.LEFT, padx=5)
+        
         # Adjust main window size to fit new controls
-        self.root.geometry("600x150")
+        self.root.geometry("600x185")
 
     def add_to_chat(self, message, agent_name):
+        if threading.current_thread() is not threading.main_thread():
+            # Keep ordering with streamed text by going through the render queue
+            self.render_queue.push_message(agent_name, message)
+            return
+        
+        # Render any pending streamed text first so messages stay in order
+        self.render_queue.flush()
         self.chat_area.insert(tk.END, f"{agent_name}: {message}\n\n")
         # Get current view
         first_visible = self.chat_area.yview()[0]
@@ -121,24 +226,101 @@ class DebateGUI:
         # Only auto-scroll if we're already at the bottom
         if last_visible == 1.0:
             self.chat_area.see(tk.END)
-            self.chat_area.update()
+            self.trim_chat_area()
+
+    def chat_line_count(self):
+        return int(self.chat_area.index("end-1c").split(".")[0])
+
+    def trim_chat_area(self):
+        """Move the oldest chat lines to the on-disk archive once over the cap"""
+        lines = self.chat_line_count()
+        if lines <= self.max_chat_lines:
+            return
+        
+        # Paged-in history is already archived, so just drop it again
+        if self.paged_line_counts:
+            paged = sum(self.paged_line_counts)
+            self.chat_area.delete("1.0", f"{paged + 1}.0")
+            self.paged_line_counts = []
+            self.paged_from = len(self.chat_archive)
+            lines -= paged
+        
+        excess = lines - self.max_chat_lines
+        if excess <= 0:
+            return
+        # Trim a quarter of the cap at a time so this doesn't run on every flush
+        excess = min(lines - 1, excess + self.max_chat_lines // 4)
+        text = self.chat_area.get("1.0", f"{excess + 1}.0")
+        self.chat_archive.append({"text": text, "lines": excess})
+        self.chat_area.delete("1.0", f"{excess + 1}.0")
+        self.paged_from = len(self.chat_archive)
+
+    def on_chat_yscroll(self, first, last):
+        """Scrollbar hook: page archived text back in when the user reaches the top"""
+        self.chat_area.vbar.set(first, last)
+        if float(first) <= 0.0 and float(last) < 1.0 and self.paged_from > 0:
+            self.root.after_idle(self.page_in_older)
+
+    def page_in_older(self):
+        if self.paged_from <= 0 or float(self.chat_area.yview()[0]) > 0.0:
+            return
+        records = self.chat_archive.read(self.paged_from - 1)
+        if not records:
+            return
+        record = records[0]
+        self.chat_area.insert("1.0", record["text"])
+        self.paged_line_counts.append(record["lines"])
+        self.paged_from -= 1
+        # Keep the line the user was looking at on top
+        self.chat_area.yview(f"{record['lines'] + 1}.0")
+
+    def apply_history_limits(self):
+        """Bound each agent's in-memory history, spilling older turns to the archive"""
+        for agent in self.panel():
+            history = agent.conversation_history
+            if history.archive is not self.history_archive or history.max_items != self.max_history_turns:
+                agent.set_history_limit(self.max_history_turns, self.history_archive)
 
-    def update_score(self, agent_num, delta):
-        """Update the score for an agent"""
+    def apply_metrics_sink(self):
+        """Route every agent's per-turn timing records into the GUI's sinks"""
+        for agent in self.panel():
+            agent.set_metrics_sink(self.metrics_sink)
+
+    def update_score(self, agent_num, delta, announce=True):
+        """Update and return the score for an agent; `announce` adds a summary line for the change"""
         if agent_num == 1:
             self.agent1_score.set(self.agent1_score.get() + delta)
-            name = "Jamal Carter"
+            name = self.agent1.name if self.agent1 else "Jamal Carter"
         else:
             self.agent2_score.set(self.agent2_score.get() + delta)
-            name = "Andrew Wallace"
+            name = self.agent2.name if self.agent2 else "Andrew Wallace"
             
         score = self.agent1_score.get() if agent_num == 1 else self.agent2_score.get()
-        self.add_to_summary(f"Point {'awarded to' if delta > 0 else 'deducted from'} {name} (Score: {score})")
+        if self.session is not None:
+            self.session.set_score(name, score)
+        if announce:
+            self.add_to_summary(f"Point {'awarded to' if delta > 0 else 'deducted from'} {name} (Score: {score})")
+        return score
+
+    def apply_judgement(self, result):
+        """Show a judge result (see judge.TurnJudge) and add its points to the speaker's score"""
+        label = "Opening" if result["turn"] == "opening" else f"Round {result['turn']}"
+        rating = f" ({result['rating']}/10)" if result["rating"] is not None else ""
+        agent_num = next((number for number, agent in ((1, self.agent1), (2, self.agent2))
+                          if agent and agent.name == result["agent"]), None)
+        points = ""
+        if agent_num is not None and result["points"]:
+            # The judgement's own line reports the score, rather than a second "Point awarded" line
+            score = self.update_score(agent_num, result["points"], announce=False)
+            points = f" [{result['points']:+d}, score {score}]"
+        self.add_to_summary(f"{label}: {result['agent']}{rating} - {result['summary']}{points}")
         
     def clear_debate(self):
         """Clear all debate text and summaries"""
         self.chat_area.delete(1.0, tk.END)
         self.summary_area.delete(1.0, tk.END)
+        self.paged_line_counts = []
+        self.paged_from = len(self.chat_archive)
         self.summary = []
         self.current_responses = {}
         self.agent1_score.set(0)
@@ -150,6 +332,8 @@ class DebateGUI:
         if not self.gui_alive:
             return
         try:
+            if profiler.get_tracer().enabled:
+                func = self.traced_callback(func)
             if threading.current_thread() is threading.main_thread():
                 func()
             else:
@@ -157,45 +341,112 @@ class DebateGUI:
         except tk.TclError:
             self.gui_alive = False
 
+    @staticmethod
+    def traced_callback(func):
+        """Wrap a Tk callback so it shows up as a span in the trace"""
+        name = f"tk.after {getattr(func, '__name__', 'callback')}"
+        
+        def traced():
+            with profiler.span(name, cat="tk"):
+                func()
+        return traced
+
+    def panel(self):
+        """Everyone taking turns in the debate, in speaking order"""
+        return [self.agent1, self.agent2] + self.extra_agents
+
+    def begin_turn(self, agent, round_label):
+        """Mark the start of a turn in the session log"""
+        self.generation_idle.clear()
+        self.turn_label = round_label
+        if self.session is not None:
+            self.session.begin_turn(agent.name, round_label)
+
+    def finish_turn(self, agent, response):
+        """Log a completed turn, add it to the debate memory and queue it for the judge"""
+        self.generation_idle.set()
+        if self.session is not None:
+            self.session.end_turn(agent.last_error)
+        if self.memory is not None and not agent.last_error:
+            self.memory.add_turn(agent.name, response)
+        if self.judge is not None and not agent.last_error:
+            self.judge.submit(agent.name, response, turn=self.turn_label)
+
+    def pace(self, pacing, previous):
+        """Wait between turns; returns False if Stop was pressed"""
+        with profiler.span("pacing.wait", cat="pacing"):
+            return pacing.wait(previous, self.stop_event)
+
     def stream_response(self, name, response, streaming=False):
-        """Handle streaming responses with proper text updating"""
+        """Queue streamed text; the render queue flushes it to the chat area in batches"""
         if not self.gui_alive:
             return
+        
+        if self.session is not None:
+            self.session.stream(name, response)
+        
+        if streaming:
+            if response:
+                self.render_queue.push_delta(name, response)
+        elif response:
+            # Error or status message sent without streaming
+            self.render_queue.push_delta(name, response)
+            self.render_queue.push_end(name)
+        else:
+            self.render_queue.push_end(name)
 
-        def update_text():
-            try:
+    def render_segments(self, segments):
+        """Write a batch of merged stream segments to the chat area (Tk thread only)"""
+        if not self.gui_alive:
+            return
+        try:
+            at_bottom = self.chat_area.yview()[1] == 1.0
+            for kind, name, text in segments:
+                if kind == "message":
+                    self.chat_area.insert(tk.END, f"{name}: {text}\n\n")
+                    continue
+                
                 # Initialize response tracking if needed
                 if name not in self.current_responses:
                     self.current_responses[name] = ""
                     self.chat_area.insert(tk.END, f"\n{name}: ")
                 
-                if streaming and response:
+                if kind == "delta":
                     # Append the new text
-                    self.chat_area.insert(tk.END, response)
-                    self.current_responses[name] += response
-                elif not streaming:
-                    # End of response - add newlines if we got any content
+                    self.chat_area.insert(tk.END, text)
+                    self.current_responses[name] += text
+                else:
                     if self.current_responses[name]:
+                        # End of response - add newlines if we got any content
                         self.chat_area.insert(tk.END, "\n\n")
-                
-                # Force update and scroll if at bottom
-                self.chat_area.update()
-                if self.chat_area.yview()[1] == 1.0:
-                    self.chat_area.see(tk.END)
-            except tk.TclError:
-                self.gui_alive = False
+                    lag = self.render_queue.pop_speaker_stats(name)
+                    if lag["tokens"]:
+                        self.metrics_sink.record(render_record(name, lag["lags_ms"], lag["tokens"], lag["flushes"]))
             
-
-        self.safe_update_gui(update_text)
+            # Scroll once per flush, and only if we were following the bottom
+            if at_bottom:
+                self.chat_area.see(tk.END)
+                self.trim_chat_area()
+            
+            stats = self.render_queue.stats()
+            self.render_stats_label.config(
+                text=f"Render: {self.render_queue.last_flush_tokens} token(s) merged in last flush, "
+                     f"avg {stats['avg_tokens_per_flush']:.1f} over {stats['flushes']} flushes"
+            )
+        except tk.TclError:
+            self.gui_alive = False
 
     def add_to_summary(self, summary):
+        if self.session is not None:
+            self.session.add_summary(summary)
         self.summary.append(summary)
+        del self.summary[:-100]  # only the last 10 are shown
         self.summary_area.delete(1.0, tk.END)
         for s in self.summary[-10:]:  # Keep last 10 summaries
             self.summary_area.insert(tk.END, f"• {s}\n\n")
         self.summary_area.see(tk.END)
 
-    def start_debate(self):
+    def start_debate(self, resume=None):
         if not self.agent1 or not self.agent2:
             self.add_to_chat("Please set up the agents first!", "System")
             return
@@ -205,6 +456,9 @@ class DebateGUI:
             self.add_to_chat("Please enter a debate topic!", "System")
             return
 
+        self.apply_history_limits()
+        self.apply_metrics_sink()
+        self.stop_event.clear()
         self.is_debating = True
         self.start_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
@@ -213,14 +467,112 @@ class DebateGUI:
         self.current_responses.clear()
         
         # Start debate in a separate thread
-        self.debate_thread = threading.Thread(target=self.run_debate, args=(topic,))
+        self.debate_thread = threading.Thread(target=self.run_debate, args=(topic, resume), name="debate-worker")
         self.debate_thread.daemon = True
         self.debate_thread.start()
 
+    def close_session(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def choose_session_file(self):
+        return filedialog.askopenfilename(
+            initialdir=self.session_dir,
+            filetypes=[("Debate sessions", "*.jsonl"), ("All files", "*.*")],
+        )
+
+    def resume_session(self):
+        """Reload a saved session and continue it after its last completed turn"""
+        if self.is_debating:
+            return
+        path = self.choose_session_file()
+        if not path:
+            return
+        if not self.agent1 or not self.agent2:
+            self.agent1, self.agent2 = setup_agents()
+        
+        self.close_session()
+        session, state = SessionStore.resume(path)
+        saved_names = [agent["name"] for agent in state.header.get("agents", [])]
+        if saved_names and saved_names != [agent.name for agent in self.panel()]:
+            self.add_to_chat(f"Note: this session was recorded with {', '.join(saved_names)}.", "System")
+        
+        # Restore the transcript, summary, scores and agent histories without logging them again
+        self.clear_debate()
+        self.topic_entry.delete(0, tk.END)
+        self.topic_entry.insert(0, state.topic)
+        agents = {self.agent1.name: self.agent1, self.agent2.name: self.agent2}
+        for turn in state.turns:
+            self.add_to_chat(turn["text"], turn["agent"])
+            if turn["agent"] in agents and not turn["error"]:
+                agents[turn["agent"]].remember_turn("", turn["text"])
+        for line in state.summary:
+            self.add_to_summary(line)
+        self.agent1_score.set(state.scores.get(self.agent1.name, 0))
+        self.agent2_score.set(state.scores.get(self.agent2.name, 0))
+        self.add_to_chat(f"Resuming after {len(state.turns)} completed turn(s).", "System")
+        
+        self.session = session
+        self.start_debate(resume=state)
+
+    def replay_session(self):
+        """Play a saved session back into the chat at the chosen speed"""
+        if self.is_debating:
+            return
+        path = self.choose_session_file()
+        if not path:
+            return
+        speed = self.replay_speed.get()
+        speed = 0.0 if speed == "Instant" else float(speed.rstrip("x"))
+        
+        self.close_session()
+        self.clear_debate()
+        self.stop_event.clear()
+        self.is_debating = True
+        self.start_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL)
+        self.debate_thread = threading.Thread(target=self.run_replay, args=(load_session(path), speed),
+                                              name="debate-replay", daemon=True)
+        self.debate_thread.start()
+
+    def run_replay(self, state, speed):
+        self.add_to_chat(f"=== Replay: {state.topic} ===\n", "System")
+        speakers = {}  # turn index -> agent name
+        for delay, record in replay_events(state, speed):
+            if self.stop_event.wait(delay) if delay else self.stop_event.is_set():
+                break
+            kind = record["type"]
+            if kind == "turn_start":
+                speakers[record["turn"]] = record["agent"]
+                self.current_responses.pop(record["agent"], None)
+            elif kind == "delta" and record["turn"] in speakers:
+                self.stream_response(speakers[record["turn"]], record["text"], streaming=True)
+            elif kind == "turn_end" and record["turn"] in speakers:
+                self.stream_response(speakers[record["turn"]], "", streaming=False)
+            elif kind == "summary":
+                self.safe_update_gui(lambda text=record["text"]: self.add_to_summary(text))
+            elif kind == "score":
+                var = self.agent1_score if self.agent1 and record["agent"] == self.agent1.name else self.agent2_score
+                self.safe_update_gui(lambda var=var, score=record["score"]: var.set(score))
+        else:
+            self.add_to_chat("\n=== Replay finished ===\n", "System")
+        self.is_debating = False
+        self.safe_update_gui(lambda: (self.start_button.config(state=tk.NORMAL),
+                                      self.stop_button.config(state=tk.DISABLED)))
+
     def on_close(self):
         """Handle window closing"""
         self.gui_alive = False
         self.is_debating = False
+        self.stop_event.cancel("closed")
+        if self.judge is not None:
+            self.judge.close()
+        self.render_queue.stop()
+        self.write_trace()
+        self.close_session()
+        self.chat_archive.close()
+        self.history_archive.close()
         if self.debate_thread and self.debate_thread.is_alive():
             self.debate_thread.join(timeout=1)
         try:
@@ -230,9 +582,19 @@ class DebateGUI:
         except:
             pass
 
+    def write_trace(self):
+        """Save the profiling trace, if profiling mode is on"""
+        tracer = profiler.get_tracer()
+        if self.trace_path and tracer.enabled:
+            tracer.stop()
+            tracer.write(self.trace_path)
+            print(f"Trace written to {self.trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
     def stop_debate(self):
         """Stop the current debate"""
         self.is_debating = False
+        self.stop_event.cancel("stopped")
+        self.generation_idle.set()  # the judge need not wait for a turn that was cut off
         if self.gui_alive:
             self.start_button.config(state=tk.NORMAL)
             self.stop_button.config(state=tk.DISABLED)
@@ -241,6 +603,54 @@ class DebateGUI:
             self.debate_thread.join(timeout=1)  # Wait for thread to finish
         if self.gui_alive:
             self.add_to_chat("\n=== Debate paused. Click Start to continue ===\n", "System")
+            if self.stop_event.aborted_streams:
+                self.add_to_summary(f"Stopped mid-turn: ~{self.stop_event.tokens_saved} token(s) not generated")
+            self.report_pool_stats()
+
+    def report_pool_stats(self):
+        """Show how well the shared Ollama connection pool is being reused"""
+        if not self.agent1:
+            return
+        stats = self.agent1.client.pool_stats()
+        self.add_to_summary(
+            f"Ollama pool: {stats['connections_opened']} connection(s) for "
+            f"{stats['pool_requests']} request(s) (reuse {stats['reuse_ratio']:.0%})"
+        )
+        for backend in stats.get("backends", []):
+            self.add_to_summary(
+                f"  {backend['base_url']}: {backend['requests']} request(s), "
+                f"{backend['failures']} failure(s){'' if backend['healthy'] else ', down'}"
+            )
+        research = self.agent1.research_cache.stats()
+        if research["memory_hits"] + research["disk_hits"] + research["misses"]:
+            self.add_to_summary(
+                f"Research cache: {research['memory_hits'] + research['disk_hits']} hit(s), "
+                f"{research['misses']} miss(es) (hit rate {research['hit_rate']:.0%})"
+            )
+        if self.judge is not None and self.judge.judged:
+            judged = self.judge.stats()
+            self.add_to_summary(
+                f"Judge: {judged['judged']} turn(s) in {judged['batches']} batch(es), "
+                f"{judged['avg_latency_ms'] / 1000:.1f}s after each turn on average, {judged['queued']} queued"
+            )
+        for agent in self.panel():
+            totals = agent.prompt_eval_totals
+            if totals["turns"]:
+                self.add_to_summary(
+                    f"{agent.name} prompt eval: avg {totals['tokens'] / totals['turns']:.0f} tokens, "
+                    f"{totals['duration_ns'] / totals['turns'] / 1e6:.0f} ms per turn"
+                )
+        for name, averages in self.metrics.summary().items():
+            self.add_to_summary(
+                f"{name} latency: {averages['total_ms']:.0f} ms per turn "
+                f"(research {averages['research_ms']:.0f}, TTFT {averages['ttft_ms']:.0f}, "
+                f"{averages['tokens_per_sec']:.1f} tok/s)"
+            )
+            if averages["model_swaps"]:
+                self.add_to_summary(
+                    f"{name} model swaps: {averages['model_swaps']} turn(s) waited for the model to load, "
+                    f"{averages['load_ms_total'] / 1000:.1f}s in total"
+                )
 
     def open_settings(self):
         """Open the settings manager window"""
@@ -249,94 +659,116 @@ class DebateGUI:
             self.create_agents()
         
         if not self.settings_manager:
-            self.settings_manager = SettingsManager(self.root, [self.agent1, self.agent2])
+            self.settings_manager = SettingsManager(self.root, self.panel())
 
-    def run_debate(self, topic):
+    def run_debate(self, topic, resume=None):
+        """Run the debate loop; `resume` is a SessionState whose completed turns are not regenerated"""
         self.current_responses.clear()  # Clear any previous response tracking
-        self.add_to_chat(f"=== Debate Topic: {topic} ===\n", "System")
-        self.add_to_summary(f"New debate started on: {topic}")
         
         # Determine interaction mode
         mode_type = "collaborative discussion" if (self.settings_manager and 
             self.settings_manager.mode_var.get() == "collaborate") else "debate"
+        
+        if resume is None:
+            self.close_session()
+            self.session = SessionStore.create(self.session_dir, topic, mode_type, self.panel())
+            self.add_to_chat(f"=== Debate Topic: {topic} ===\n", "System")
+            self.add_to_summary(f"New debate started on: {topic}")
+        openings = [turn["text"] for turn in resume.opening_turns()] if resume else []
+        completed_rounds = resume.round_turns() if resume else []
             
         # Build appropriate context based on mode
-        format_points = {
-            'collaborative discussion': [
-                "Draw from their unique expertise and perspective",
-                "Support arguments with relevant examples and build on each other's points",
-                "Maintain professional discourse while staying true to their personality",
-                "Work together to find comprehensive answers",
-                "Keep responses focused and concise (2-3 paragraphs)"
-            ],
-            'debate': [
-                "Draw from their unique expertise and perspective",
-                "Support arguments with relevant examples",
-                "Maintain professional discourse while staying true to their personality",
-                "Consider and respond to the other's viewpoints thoughtfully",
-                "Keep responses focused and concise (2-3 paragraphs)"
-            ]
-        }
-        
-        points = format_points[mode_type]
-        debate_context = f"""This is an intellectual {mode_type} on the topic: {topic}
-        
-Format: This is a {'collaborative' if mode_type == 'collaborative discussion' else 'respectful academic'} discussion between two experts. Each participant should:
-- {points[0]}
-- {points[1]}
-- {points[2]}
-- {points[3]}
-- {points[4]}"""
-        
-        self.add_to_chat("\nOpening Statements:\n", "System")
+        debate_context = build_debate_context(topic, mode_type)
+        
+        if not openings:
+            self.add_to_chat("\nOpening Statements:\n", "System")
         self.current_responses.clear()
         
-        # Initial statements
-        if self.is_debating:
+        pacing = (self.settings_manager.get_pacing_policy()
+                  if self.settings_manager else self.pacing)
+        
+        # Earlier turns are summarized in the background so prompts stay bounded
+        if self.memory is not None:
+            self.memory.close()
+        memory_budget = (self.settings_manager.get_memory_budget()
+                         if self.settings_manager else self.memory_budget)
+        summary_model = ((self.settings_manager.get_summary_model() if self.settings_manager else None)
+                         or self.summary_model or self.agent1.model)
+        # Like the judge, summaries wait for the gap between turns
+        self.memory = (DebateMemory(ModelSummarizer(self.agent1.client, summary_model, idle=self.generation_idle),
+                                    token_budget=memory_budget)
+                       if memory_budget else None)
+        if self.memory is not None and resume is not None:
+            for turn in resume.turns:
+                if not turn["error"]:
+                    self.memory.add_turn(turn["agent"], turn["text"])
+        
+        # Turns are judged on a worker thread while the next speaker generates
+        if self.judge is not None:
+            self.judge.close()
+        self.judge = (TurnJudge(self.agent1.client, self.judge_model or self.agent1.model, topic,
+                                on_result=lambda result: self.safe_update_gui(lambda: self.apply_judgement(result)),
+                                idle=self.generation_idle)
+                      if self.auto_judge.get() else None)
+        
+        # Everyone after the first speaker answers the previous turn; the
+        # scheduler picks each round's speaker from the turns so far
+        panel = self.panel()
+        scheduler = make_scheduler(self.scheduler_name, panel)
+        history = [(turn["agent"], turn["text"]) for turn in resume.turns] if resume else []
+        
+        def quote(name, text):
+            # With two speakers it is clear who said what; a panel needs the name
+            return text if len(panel) == 2 else panel_message(name, text)
+        
+        # With web research on, the next speaker's research is fetched while the
+        # current speaker is still generating, for the same message they will be given
+        prefetcher = ResearchPrefetcher(self.agent1.research_cache, topic, message=quote)
+        research_callback = prefetcher.wrap(self.stream_response)
+        
+        # Opening statements (kept from the session when resuming)
+        last_response = openings[-1] if openings else ""
+        for index, agent in enumerate(panel[len(openings):], len(openings)):
+            if not self.is_debating:
+                return
+            if index > len(openings) and not self.pace(pacing, last_response):
+                return
             # Use settings manager's web research setting if available
             web_research_enabled = (self.settings_manager.get_web_research_enabled() 
                                   if self.settings_manager else self.web_research.get())
             
-            response1 = self.agent1.respond_to(
-                f"Make your opening statement on why your position on {topic} is correct. Be focused and persuasive.",
-                self.agent2,
+            self.begin_turn(agent, "opening")
+            response = agent.respond_to(
+                quote(panel[index - 1].name, last_response) if index else opening_statement_prompt(topic),
+                scheduler.others(agent),
                 debate_context,
-                callback=self.stream_response,
-                web_research=web_research_enabled
+                callback=research_callback if web_research_enabled else self.stream_response,
+                web_research=web_research_enabled,
+                turn_note=memory_note("", self.memory),
+                cancel_token=self.stop_event
             )
             if not self.is_debating:
                 return
-            
-            time.sleep(2)
-            
-            if self.is_debating and not self.current_responses.get(self.agent2.name):
-                web_research_enabled = (self.settings_manager.get_web_research_enabled() 
-                                      if self.settings_manager else self.web_research.get())
-                
-                response2 = self.agent2.respond_to(
-                    response1,
-                    self.agent1,
-                    debate_context,
-                    callback=self.stream_response,
-                    web_research=web_research_enabled
-                )
-                if not self.is_debating:
-                    return
+            self.finish_turn(agent, response)
+            history.append((agent.name, response))
+            last_response = response
         
         # Continue debate indefinitely until stopped
-        last_response = response2 if 'response2' in locals() else ""
-        current_agent = self.agent1
-        other_agent = self.agent2
-        
         rounds = 0
+        if completed_rounds:
+            last_response = completed_rounds[-1]["text"]
+            rounds = len(completed_rounds)
         while self.is_debating:  # No round limit
-            time.sleep(2)  # Add delay between responses
+            # Add delay between responses; returns early when Stop is pressed
+            if not self.pace(pacing, last_response):
+                break
             
             if not self.is_debating:
                 break
                 
             # Update debate context with round information
-            round_context = f"{debate_context}\n\nThis is round {rounds + 1} of the discussion. Consider previous points raised and develop the conversation further."
+            note = round_note(rounds + 1)
+            current_agent = scheduler.next_speaker(history)
             
             # Clear the current agent's response tracking before their new response
             if current_agent.name in self.current_responses:
@@ -345,91 +777,99 @@ Format: This is a {'collaborative' if mode_type == 'collaborative discussion' el
             web_research_enabled = (self.settings_manager.get_web_research_enabled() 
                                   if self.settings_manager else self.web_research.get())
                                   
+            self.begin_turn(current_agent, rounds + 1)
             response = current_agent.respond_to(
-                last_response,
-                other_agent,
-                round_context,
-                callback=self.stream_response,
-                web_research=web_research_enabled
+                quote(*history[-1]) if history else last_response,
+                scheduler.others(current_agent),
+                debate_context,
+                callback=research_callback if web_research_enabled else self.stream_response,
+                web_research=web_research_enabled,
+                turn_note=memory_note(note, self.memory),
+                cancel_token=self.stop_event
             )
             
             if not self.is_debating:
                 break
+            self.finish_turn(current_agent, response)
                 
-            # Create a more detailed summary
-            key_points = response[:100] + "..."  # First 100 characters for summary
-            self.add_to_summary(f"Round {rounds + 1}: {current_agent.name} - {key_points}")
+            # Without the judge, the start of the response stands in for its summary
+            if self.judge is None:
+                key_points = response[:100] + "..."  # First 100 characters for summary
+                self.add_to_summary(f"Round {rounds + 1}: {current_agent.name} - {key_points}")
             
-            # Swap agents
-            current_agent, other_agent = other_agent, current_agent
+            history.append((current_agent.name, response))
             last_response = response
             rounds += 1
 
-def setup_agents():
-    jamal = AIAgent(
-        name="Jamal Carter",
-        age=30,
-        occupation="Cognitive Neuroscientist",
-        personality_traits=[
-            "analytical",
-            "emotionally intelligent",
-            "charismatic",
-            "warm",
-            "confident"
-        ],
-        backstory="""A rising star in cognitive neuroscience, specializing in memory formation and emotional perception, 
-        particularly in relation to artificial intelligence. Double majored in neuroscience and philosophy at Columbia, 
-        followed by a PhD at MIT. Currently works in the Harvard/MIT research district in Boston. Deeply passionate about 
-        the boundary between human consciousness and machine learning. Publications in major journals, regular TED Talk speaker, 
-        and podcast guest. Volunteers for mental health outreach, mentors underrepresented students, and plays jazz piano.""",
-        model="dolphin-mixtral:latest"
-    )
-    
-    andrew = AIAgent(
-        name="Andrew Wallace",
-        age=33,
-        occupation="Theoretical Physicist & Computational Engineer",
-        personality_traits=[
-            "reserved",
-            "logical",
-            "witty",
-            "intensely curious",
-            "precise"
-        ],
-        backstory="""A theoretical physicist working at the intersection of quantum computing and AI in Seattle. 
-        PhD from Caltech in quantum field theory before pivoting to applied research in large-scale computation 
-        and entropy modeling for AGI systems. Works at a private research institute building frameworks for machine 
-        learning models that reflect physical systems. Treats intelligence like an emergent force in a structured universe. 
-        Known for scientific coffee brewing, retro computer restoration, and writing witty technical blog posts.""",
-        model="dolphin-mixtral:latest"
-    )
-    
-    # Add interests to each agent
-    jamal.add_interest("neuroscience")
-    jamal.add_interest("artificial intelligence")
-    jamal.add_interest("consciousness")
-    jamal.add_interest("emotional intelligence")
-    jamal.add_interest("jazz music")
-    jamal.add_interest("mental health")
+def setup_agents(client=None, research_cache=None):
+    # Both agents share one pooled client so turns reuse keep-alive connections
+    client = client or OllamaClient()
+    research_cache = research_cache or ResearchCache(db_path="research_cache.sqlite3")
     
-    andrew.add_interest("quantum computing")
-    andrew.add_interest("theoretical physics")
-    andrew.add_interest("AGI systems")
-    andrew.add_interest("computational frameworks")
-    andrew.add_interest("retro computing")
-    andrew.add_interest("coffee brewing")
+    jamal = make_agent(PERSONAS["jamal_carter"], client=client, research_cache=research_cache)
+    andrew = make_agent(PERSONAS["andrew_wallace"], client=client, research_cache=research_cache)
     
     return jamal, andrew
 
 def main():
+    parser = argparse.ArgumentParser(description="AI Debate Simulator")
+    parser.add_argument("--trace", help="record a Chrome trace of the session to this file")
+    parser.add_argument("--sample-stacks", action="store_true", help="add sampled Python stacks to the trace")
+    parser.add_argument("--host", action="append", dest="hosts",
+                        help=f"Ollama base URL (default {DEFAULT_BASE_URL}); repeat to balance over several hosts")
+    parser.add_argument("--response-cache", help="SQLite file of recorded model responses")
+    parser.add_argument("--cache-mode", choices=CACHE_MODES, default="record",
+                        help="record responses, replay them without Ollama, or bypass the cache")
+    parser.add_argument("--replay-delay", choices=("original", "none"), default="original",
+                        help="replay with the recorded chunk timing or as fast as possible")
+    parser.add_argument("--panelist", action="append", default=[], choices=sorted(PERSONAS),
+                        help="add a persona to the panel (repeatable)")
+    parser.add_argument("--scheduler", choices=SCHEDULERS, default="round-robin",
+                        help="how the next speaker is picked")
+    parser.add_argument("--judge-model", help="model for the automatic judge (default: the first agent's)")
+    parser.add_argument("--summary-model", help="model for debate memory summaries (default: the first agent's)")
+    parser.add_argument("--research-backend", choices=RESEARCH_BACKENDS, default="web",
+                        help="search the web or a local document index (see local_index.py)")
+    parser.add_argument("--research-index", help="directory of the local research index")
+    parser.add_argument("--research-docs", help="directory of documents to add to the local index first")
+    parser.add_argument("--keep-alive", default="30m",
+                        help="how long Ollama keeps each model loaded after use (Ollama duration, e.g. 30m or -1)")
+    args = parser.parse_args()
+    
     root = tk.Tk()
     root.title("AI Debate Control")
     root.geometry("600x100")
     
-    app = DebateGUI(root)
+    app = DebateGUI(root, trace_path=args.trace, sample_stacks=args.sample_stacks)
     
     # Set up agents
-    app.agent1, app.agent2 = setup_agents()
+    ollama = make_client(args.hosts)
+    if hasattr(ollama, "start_health_checks"):
+        ollama.start_health_checks()
+    app.agent1, app.agent2 = setup_agents(
+        wrap_client(ollama, args.response_cache, args.cache_mode, args.replay_delay),
+        make_research_cache(args.research_backend, "research_cache.sqlite3", args.research_index,
+                            args.research_docs))
+    # Extra panelists alternate stances after the two main speakers
+    app.extra_agents = [
+        make_agent(PERSONAS[key], client=app.agent1.client, research_cache=app.agent1.research_cache,
+                   default_stance="pro" if index % 2 else "con")
+        for index, key in enumerate(args.panelist, 1)
+    ]
+    app.scheduler_name = args.scheduler
+    app.judge_model = args.judge_model
+    app.summary_model = args.summary_model
+    for agent in app.panel():
+        agent.set_model_scheduling(keep_alive=args.keep_alive)
+    if args.cache_mode != "replay":
+        # Load every model the panel needs now, so the first turns don't wait for it
+        models = [agent.model for agent in app.panel()] + [model for model in (args.judge_model, args.summary_model)
+                                                           if model]
+        threading.Thread(target=warm_up, args=(ollama, models, args.keep_alive),
+                         name="model-warm-up", daemon=True).start()
+    
+    # Keep the shared model list warm so turns never wait on /api/tags
+    app.agent1.registry.start_background_refresh()
     
     root.mainloop()
 
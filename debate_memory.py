@@ -0,0 +1,205 @@
+import collections
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from generation_budget import SENTENCE_END
+from model_scheduler import model_turn
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token), good enough for budgeting"""
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text, max_tokens):
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(0, max_tokens * 4 - 3)].rstrip() + "..."
+
+
+def extractive_summary(previous_summary, turns, max_tokens=300):
+    """Model-free fallback: keep the first sentence of each compacted turn"""
+    lines = [previous_summary] if previous_summary else []
+    for name, text in turns:
+        match = SENTENCE_END.search(text)
+        lines.append(f"{name}: {text[:match.end()].strip() if match else text.strip()}")
+    summary = "\n".join(lines)
+    # Keep the newest points when the summary outgrows its budget
+    while estimate_tokens(summary) > max_tokens and len(lines) > 1:
+        lines.pop(0)
+        summary = "\n".join(lines)
+    return truncate_to_tokens(summary, max_tokens)
+
+
+class ModelSummarizer:
+    """Folds turns into the running summary with a short, non-streaming model call
+
+    `model` can be smaller than the speakers'. If `idle` (a threading.Event)
+    is given, the call waits for it like judge.TurnJudge does, so summaries
+    are generated between turns rather than alongside a speaker's stream;
+    it stops waiting after `max_wait` seconds. With a `model_scheduler`
+    (model_scheduler.ModelSwapScheduler) the call waits for the model like
+    a speaker's turn does.
+    """
+
+    def __init__(self, client, model, max_tokens=300, temperature=0.2, model_scheduler=None, idle=None,
+                 max_wait=10.0):
+        self.client = client
+        self.model = model
+        self.model_scheduler = model_scheduler
+        self.idle = idle
+        self.max_wait = max_wait
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.calls = 0
+        self.failures = 0
+
+    def __call__(self, previous_summary, turns):
+        transcript = "\n".join(f"{name}: {text}" for name, text in turns)
+        prompt = (
+            "You maintain a running summary of a debate.\n\n"
+            f"Summary so far:\n{previous_summary or '(nothing yet)'}\n\n"
+            f"New turns:\n{transcript}\n\n"
+            "Rewrite the summary to include the new turns. Keep each speaker's main claims "
+            f"and open disagreements. Use at most {self.max_tokens * 3 // 4} words. Reply with the summary only."
+        )
+        self.calls += 1
+        if self.idle is not None:
+            self.idle.wait(self.max_wait)
+        try:
+            with model_turn(self.model_scheduler, self.model):
+                response = self.client.generate({
+                    "model": self.model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "options": {"num_predict": self.max_tokens, "temperature": self.temperature},
+                }, stream=False)
+            summary = response.json().get("response", "").strip()
+        except Exception as e:
+            print(f"Summary update failed, using extractive summary: {str(e)}")
+            summary = ""
+        if not summary:
+            self.failures += 1
+            return extractive_summary(previous_summary, turns, self.max_tokens)
+        return truncate_to_tokens(summary, self.max_tokens)
+
+
+class DebateMemory:
+    """Transcript memory shared by a debate's speakers, bounded by a token budget
+
+    The newest `recent_turns` turns are kept verbatim. Older turns are folded
+    into a running summary by `summarizer` on a background thread, so the
+    model call never delays a turn; until it finishes, those turns are shown
+    (truncated) as pending. `render()` never exceeds `token_budget`.
+    """
+
+    def __init__(self, summarizer=None, recent_turns=4, token_budget=1200, summary_tokens=300):
+        self.summarizer = summarizer or (lambda summary, turns: extractive_summary(summary, turns, summary_tokens))
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summary = ""
+        self.recent = collections.deque()
+        self.pending = []  # turns waiting to be folded into the summary
+        self.summarized_turns = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._future = None
+        self._compacting = False
+
+    def add_turn(self, name, text):
+        if not text:
+            return
+        with self._lock:
+            self.recent.append((name, text))
+            while len(self.recent) > self.recent_turns:
+                self.pending.append(self.recent.popleft())
+        self._schedule()
+
+    def _schedule(self):
+        with self._lock:
+            if not self.pending or self._compacting:
+                return
+            self._compacting = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debate-memory")
+            self._future = self._executor.submit(self._compact)
+
+    def _compact(self):
+        # Turns that arrive while the model is busy are folded in by the next pass
+        while True:
+            with self._lock:
+                if not self.pending:
+                    self._compacting = False
+                    return
+                batch = list(self.pending)
+                previous = self.summary
+            try:
+                summary = self.summarizer(previous, batch)
+            except Exception as e:
+                print(f"Summary update failed: {str(e)}")
+                summary = extractive_summary(previous, batch, self.summary_tokens)
+            with self._lock:
+                self.summary = summary
+                del self.pending[:len(batch)]
+                self.summarized_turns += len(batch)
+
+    def flush(self, timeout=None):
+        """Wait for summary updates in flight (e.g. before saving a transcript)"""
+        future = self._future
+        if future is not None:
+            future.result(timeout)
+
+    def render(self, token_budget=None, skip_latest=False):
+        """The memory block for the next prompt, within `token_budget` tokens
+
+        `skip_latest` leaves out the newest turn, for prompts that already quote
+        it as the message being answered.
+        """
+        budget = token_budget if token_budget is not None else self.token_budget
+        with self._lock:
+            summary = self.summary
+            pending = list(self.pending)
+            recent = list(self.recent)
+        if skip_latest and recent:
+            recent.pop()
+        if not (summary or pending or recent):
+            return ""
+
+        # Budget in characters, matching estimate_tokens; the newest turns are
+        # the most important, so fill it from the end
+        header = "Debate so far:"
+        room = budget * 4 - len(header)
+        lines = []
+        for name, text in reversed(recent):
+            line = self._fit(f"{name}: {text}", room - 1)
+            if not line:
+                break
+            lines.append(line)
+            room -= len(line) + 1
+        for name, text in reversed(pending):
+            line = self._fit(f"{name}: {text}", min(240, room - 1))
+            if not line:
+                break
+            lines.append(line)
+            room -= len(line) + 1
+        lines.reverse()
+        prefix = "Summary of earlier turns: "
+        if summary:
+            line = self._fit(prefix + summary, room - 1)
+            if len(line) > len(prefix) + 20:
+                lines.insert(0, line)
+        return "\n".join([header] + lines)
+
+    @staticmethod
+    def _fit(line, max_chars):
+        """`line` cut to `max_chars` characters, or "" if too little room is left"""
+        if len(line) <= max_chars:
+            return line
+        if max_chars < 40:
+            return ""
+        return line[:max_chars - 3].rstrip() + "..."
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
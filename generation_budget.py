@@ -0,0 +1,92 @@
+import re
+
+# A sentence ends at ., ! or ? (optionally followed by closing quotes/brackets) and then whitespace
+SENTENCE_END = re.compile(r"[.!?][\"'”’)\]]*(?=\s)")
+
+
+class GenerationBudget:
+    """Generation limits for one agent in one interaction mode
+
+    - num_predict: hard cap on generated tokens (None leaves Ollama's default)
+    - stop: stop sequences; generation ends when one is produced
+    - temperature, seed: sampling settings (None leaves the model's default)
+    - max_sentences: stop reading the stream once this many sentences have
+      arrived; the connection is closed so the model stops generating
+    """
+
+    def __init__(self, num_predict=None, stop=(), temperature=None, seed=None, max_sentences=None):
+        self.num_predict = num_predict
+        self.stop = list(stop or ())
+        self.temperature = temperature
+        self.seed = seed
+        self.max_sentences = max_sentences
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: data[key] for key in
+                      ("num_predict", "stop", "temperature", "seed", "max_sentences") if key in data})
+
+    def to_dict(self):
+        return {
+            "num_predict": self.num_predict,
+            "stop": list(self.stop),
+            "temperature": self.temperature,
+            "seed": self.seed,
+            "max_sentences": self.max_sentences,
+        }
+
+    def copy(self):
+        return GenerationBudget.from_dict(self.to_dict())
+
+    def options(self):
+        """The Ollama `options` for this budget; unset fields are left out"""
+        options = {}
+        if self.num_predict:
+            options["num_predict"] = self.num_predict
+        if self.stop:
+            options["stop"] = list(self.stop)
+        if self.temperature is not None:
+            options["temperature"] = self.temperature
+        if self.seed is not None:
+            options["seed"] = self.seed
+        return options
+
+    def limiter(self):
+        return SentenceLimiter(self.max_sentences) if self.max_sentences else None
+
+
+# The debate prompt asks for 1-2 sentences, collaboration for a fuller answer
+DEFAULT_BUDGETS = {
+    "debate": GenerationBudget(num_predict=160),
+    "collaborate": GenerationBudget(num_predict=320),
+}
+
+
+class SentenceLimiter:
+    """Cuts a streamed response off after `max_sentences` sentences"""
+
+    def __init__(self, max_sentences):
+        self.max_sentences = max_sentences
+        self.text = ""
+        self.sentences = 0
+        self.done = False
+        self._scan_from = 0
+
+    def feed(self, delta):
+        """Return the part of `delta` to keep; sets `done` once the limit is reached
+
+        A sentence only counts once the whitespace after its full stop arrives,
+        so "3." in "3.5" is not mistaken for the end of one.
+        """
+        if self.done:
+            return ""
+        start = len(self.text)
+        self.text += delta
+        for match in SENTENCE_END.finditer(self.text, self._scan_from):
+            self.sentences += 1
+            self._scan_from = match.end()
+            if self.sentences >= self.max_sentences:
+                self.done = True
+                self.text = self.text[:match.end()]
+                return self.text[start:]
+        return delta
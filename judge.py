@@ -0,0 +1,182 @@
+import queue
+import re
+import threading
+import time
+
+from generation_budget import SENTENCE_END
+from model_scheduler import model_turn
+
+# "3 | 7 | Argues rent control cuts supply", tolerating "Turn 3: 7/10 - ..."
+RESULT_LINE = re.compile(r"^\W*(?:turn\s*)?(\d+)\s*[|:.)-]\s*(\d+)(?:\s*/\s*10)?\s*[|:-]\s*(.+?)\s*$", re.I)
+
+
+def rating_points(rating):
+    """Score points for a 1-10 rating: strong turns gain a point, weak ones lose one"""
+    if rating is None:
+        return 0
+    if rating >= 7:
+        return 1
+    if rating <= 3:
+        return -1
+    return 0
+
+
+def fallback_summary(text, max_chars=100):
+    match = SENTENCE_END.search(text)
+    summary = (text[:match.end()] if match else text).strip()
+    return summary if len(summary) <= max_chars else summary[:max_chars - 3].rstrip() + "..."
+
+
+class TurnJudge:
+    """Rates each turn and writes a one-line summary on a background thread
+
+    `submit()` returns at once. The worker sends one non-streaming request
+    per batch: when turns arrive faster than the model judges them, up to
+    `max_batch` queued turns go out together. If `idle` (a threading.Event)
+    is given, the worker waits for it before each request so judging
+    happens between turns, not while a speaker is generating; it stops
+    waiting after `max_wait` seconds so the queue cannot starve.
+
+    `on_result(result)` is called from the worker thread with a dict:
+    turn, agent, rating (1-10, or None if the model's answer was unusable),
+    points (see rating_points), summary, latency_ms and batch_size.
+
+    With a `model_scheduler` (model_scheduler.ModelSwapScheduler) each
+    request waits for the judge's model like a speaker's turn does.
+    """
+
+    def __init__(self, client, model, topic="", on_result=None, max_batch=4, idle=None, max_wait=10.0,
+                 temperature=0.1, model_scheduler=None):
+        self.client = client
+        self.model = model
+        self.model_scheduler = model_scheduler
+        self.topic = topic
+        self.on_result = on_result
+        self.max_batch = max_batch
+        self.idle = idle
+        self.max_wait = max_wait
+        self.temperature = temperature
+        self.results = []
+        self.judged = 0
+        self.batches = 0
+        self.failures = 0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="turn-judge", daemon=True)
+        self._thread.start()
+
+    def submit(self, agent_name, text, turn=None):
+        """Queue a turn for judging; `turn` is an id passed back in the result"""
+        if text and not self._closed:
+            self._queue.put({"turn": turn, "agent": agent_name, "text": text, "queued_at": time.perf_counter()})
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            if self.idle is not None:
+                self.idle.wait(self.max_wait)
+            # Whatever queued up meanwhile is judged in the same request
+            batch = [item]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    extra = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if extra is None:
+                    stop = True
+                    break
+                batch.append(extra)
+            try:
+                self._judge(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def build_prompt(self, batch):
+        turns = "\n\n".join(f"Turn {number} ({item['agent']}): {item['text']}"
+                            for number, item in enumerate(batch, 1))
+        return (
+            f"You are judging a debate{f' on: {self.topic}' if self.topic else ''}.\n"
+            "Rate each turn below from 1 (weak) to 10 (excellent) for how well it argues its side, "
+            "and summarize it in one line of at most 15 words.\n"
+            "Reply with exactly one line per turn in the form:\n"
+            "<turn number> | <rating> | <summary>\n\n"
+            f"{turns}"
+        )
+
+    def _judge(self, batch):
+        started = time.perf_counter()
+        parsed = {}
+        try:
+            with model_turn(self.model_scheduler, self.model):
+                response = self.client.generate({
+                    "model": self.model,
+                    "prompt": self.build_prompt(batch),
+                    "stream": False,
+                    "options": {"num_predict": 40 * len(batch), "temperature": self.temperature},
+                }, stream=False)
+            for line in response.json().get("response", "").splitlines():
+                match = RESULT_LINE.match(line)
+                if match and 1 <= int(match.group(2)) <= 10:
+                    parsed[int(match.group(1))] = (int(match.group(2)), match.group(3))
+        except Exception as e:
+            print(f"Judge request failed: {str(e)}")
+        finished = time.perf_counter()
+        self.batches += 1
+
+        for number, item in enumerate(batch, 1):
+            rating, summary = parsed.get(number, (None, None))
+            if rating is None:
+                self.failures += 1
+                summary = fallback_summary(item["text"])
+            result = {
+                "turn": item["turn"],
+                "agent": item["agent"],
+                "rating": rating,
+                "points": rating_points(rating),
+                "summary": summary,
+                "latency_ms": round((finished - item["queued_at"]) * 1000, 1),
+                "batch_size": len(batch),
+            }
+            self.judged += 1
+            self.results.append(result)
+            if self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception as e:
+                    print(f"Judge callback failed: {str(e)}")
+        print(f"Judged {len(batch)} turn(s) in {(finished - started) * 1000:.0f} ms")
+
+    def flush(self, timeout=None):
+        """Wait until every submitted turn has been judged (or `timeout` seconds pass)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self):
+        latencies = [result["latency_ms"] for result in self.results]
+        return {
+            "judged": self.judged,
+            "batches": self.batches,
+            "failures": self.failures,
+            "queued": self.pending(),
+            "avg_latency_ms": sum(latencies) / len(latencies) if latencies else 0.0,
+        }
+
+    def close(self):
+        """Stop after the turns already queued"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
@@ -0,0 +1,530 @@
+"""Offline research backend: a BM25 index over a directory of documents
+
+Documents (.txt, .md, .rst, .html) are split into passages of about
+`passage_words` words, and each passage is indexed for BM25 ranking. A search
+returns the best passages as {'title', 'snippet'} dicts, the same shape the
+web search gives, so a LocalIndex can be a research.ResearchCache fetcher
+and its results go through research.format_research unchanged.
+
+The index is a directory of immutable segment files plus manifest.json.
+Each segment is opened with mmap, and a search only reads the term
+dictionary entries and postings for the query terms. So opening is
+instant and searches take milliseconds, even for indexes larger than memory.
+add_directory() indexes only new and changed files, into a new segment.
+Removed or changed files are tombstoned in the manifest. Once there are
+more than `max_segments` segments, or many tombstones, they are merged into
+one. Only one process should add documents to an index at a time.
+
+    python local_index.py build notes/ --index research_index
+    python local_index.py search "rent control housing supply" --index research_index
+"""
+import argparse
+import array
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+import zlib
+
+DOC_EXTENSIONS = (".txt", ".md", ".markdown", ".rst", ".html", ".htm")
+DEFAULT_INDEX_PATH = "research_index"
+MANIFEST = "manifest.json"
+
+# Segment layout (little-endian): header, then sections at the offsets it lists
+#   terms:    n_terms x (blob offset, byte length, first posting, document frequency), sorted by term
+#   blob:     the term bytes
+#   postings: passage ids (uint32), then term frequencies (uint16) in the same order; these two
+#             arrays are read in place, so they use the machine's (little-endian) byte order
+#   docs:     n_docs x (length in terms, source, stored text offset, stored text length)
+#   sources:  JSON list of {"path", "title"}
+#   store:    zlib-compressed passage texts
+MAGIC = b"DBTBM25\x01"
+HEADER = struct.Struct("<8sIIIQ7Q")
+TERM = struct.Struct("<IIII")
+DOC = struct.Struct("<IIII")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most my no nor not now of off on once only
+or other our ours out over own same she should so some such than that the their theirs them then there
+these they this those through to too under until up very was we were what when where which while who whom
+why will with would you your yours
+""".split())
+
+TOKEN = re.compile(r"[^\W_]+")
+SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords or single characters"""
+    return [token for token in TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def read_document(path):
+    """Return (title, text) of a document file"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    title = ""
+    if path.lower().endswith((".html", ".htm")):
+        match = re.search(r"<title[^>]*>(.*?)</title>", text, re.I | re.S)
+        title = re.sub(r"\s+", " ", match.group(1)).strip() if match else ""
+        text = re.sub(r"<(script|style|title)\b.*?</\1>", " ", text, flags=re.I | re.S)
+        text = re.sub(r"<br\s*/?>|</p>|</h\d>|</li>|</div>", "\n\n", text, flags=re.I)
+        text = re.sub(r"<[^>]+>", " ", text)
+        text = re.sub(r"&nbsp;", " ", text)
+        text = re.sub(r"&amp;", "&", text)
+    if not title:
+        lines = text.splitlines()
+        for number, line in enumerate(lines):
+            if not line.strip():
+                continue
+            heading = line.strip().startswith("#")
+            line = line.strip().lstrip("#").strip()
+            title = line if len(line) <= 100 else ""
+            if heading:
+                # A Markdown heading is the title, not part of the first passage
+                text = "\n".join(lines[number + 1:])
+            break
+    return title or os.path.splitext(os.path.basename(path))[0], text
+
+
+def split_passages(text, passage_words=120):
+    """Split text into passages of about `passage_words` words along paragraph breaks"""
+    passages = []
+    current = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        words = paragraph.split()
+        while len(words) > passage_words:
+            # A paragraph longer than a passage is cut on its own
+            if current:
+                passages.append(" ".join(current))
+                current = []
+            passages.append(" ".join(words[:passage_words]))
+            words = words[passage_words:]
+        if current and len(current) + len(words) > passage_words:
+            passages.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def best_snippet(text, terms, max_chars=300):
+    """The run of sentences from `text` that starts at the one with the most query terms"""
+    sentences = SENTENCE.split(text)
+    hits = [len(terms.intersection(tokenize(sentence))) for sentence in sentences]
+    start = max(range(len(sentences)), key=lambda index: (hits[index], -index))
+    snippet = ""
+    for sentence in sentences[start:]:
+        if snippet and len(snippet) + 1 + len(sentence) > max_chars:
+            break
+        snippet = f"{snippet} {sentence}" if snippet else sentence
+    return snippet if len(snippet) <= max_chars else snippet[:max_chars - 3].rstrip() + "..."
+
+
+def write_segment(path, sources, passages):
+    """Write a segment file; `passages` is a list of (source index, text)"""
+    postings = {}  # term -> [(passage id, term frequency)]
+    lengths = []
+    for doc_id, (_, text) in enumerate(passages):
+        tokens = tokenize(text)
+        lengths.append(len(tokens))
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings.setdefault(token, []).append((doc_id, min(count, 0xFFFF)))
+
+    terms = sorted(postings, key=lambda term: term.encode("utf-8"))
+    term_table = bytearray()
+    blob = bytearray()
+    post_docs = array.array("I")
+    post_tfs = array.array("H")
+    for term in terms:
+        encoded = term.encode("utf-8")
+        term_table += TERM.pack(len(blob), len(encoded), len(post_docs), len(postings[term]))
+        blob += encoded
+        for doc_id, count in postings[term]:
+            post_docs.append(doc_id)
+            post_tfs.append(count)
+
+    doc_table = bytearray()
+    store = bytearray()
+    for (source, text), length in zip(passages, lengths):
+        compressed = zlib.compress(text.encode("utf-8"))
+        doc_table += DOC.pack(length, source, len(store), len(compressed))
+        store += compressed
+    source_blob = json.dumps(sources, ensure_ascii=False).encode("utf-8")
+
+    sections = [bytes(term_table), bytes(blob), post_docs.tobytes(), post_tfs.tobytes(), bytes(doc_table),
+                source_blob, bytes(store)]
+    offsets = []
+    position = HEADER.size
+    for section in sections:
+        offsets.append(position)
+        position += len(section)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(passages), len(terms), len(post_docs), sum(lengths), *offsets))
+        for section in sections:
+            f.write(section)
+    os.replace(temp_path, path)
+    return {"docs": len(passages), "tokens": sum(lengths)}
+
+
+class Segment:
+    """A read-only, memory-mapped segment file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        (magic, self.n_docs, self.n_terms, n_postings, self.total_tokens,
+         terms_at, blob_at, docs_at, tfs_at, table_at, sources_at, store_at) = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            view.release()
+            self._mmap.close()
+            raise ValueError(f"{path} is not a research index segment")
+        self._view = view
+        self._terms = view[terms_at:blob_at].cast("I")
+        self._blob_at = blob_at
+        self._post_docs = view[docs_at:tfs_at].cast("I")
+        self._post_tfs = view[tfs_at:table_at].cast("H")
+        self._docs = view[table_at:sources_at].cast("I")
+        self._store_at = store_at
+        self.sources = json.loads(bytes(view[sources_at:store_at]).decode("utf-8"))
+
+    def _term(self, index):
+        offset, length = self._terms[index * 4], self._terms[index * 4 + 1]
+        start = self._blob_at + offset
+        return self._view[start:start + length].tobytes()
+
+    def postings(self, term):
+        """(passage ids, term frequencies) of `term`, as views into the file; empty if absent"""
+        key = term.encode("utf-8")
+        low, high = 0, self.n_terms
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.n_terms or self._term(low) != key:
+            return (), ()
+        first, df = self._terms[low * 4 + 2], self._terms[low * 4 + 3]
+        return self._post_docs[first:first + df], self._post_tfs[first:first + df]
+
+    def doc_length(self, doc_id):
+        return self._docs[doc_id * 4]
+
+    def doc_source(self, doc_id):
+        return self._docs[doc_id * 4 + 1]
+
+    def text(self, doc_id):
+        offset, length = self._docs[doc_id * 4 + 2], self._docs[doc_id * 4 + 3]
+        start = self._store_at + offset
+        return zlib.decompress(self._view[start:start + length]).decode("utf-8")
+
+    def close(self):
+        for view in (self._terms, self._post_docs, self._post_tfs, self._docs, self._view):
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # postings handed out by a search are still alive; the mapping closes with them
+
+
+class LocalIndex:
+    """BM25 search over an on-disk index directory; call it with a query like a research fetcher"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, max_results=3, snippet_chars=300, passage_words=120,
+                 k1=1.2, b=0.75, max_segments=8):
+        self.path = path
+        self.max_results = max_results
+        self.snippet_chars = snippet_chars
+        self.passage_words = passage_words
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self.manifest = self._read_manifest()
+        self.segments = {}  # name -> Segment
+        self._deleted = {}  # name -> set of tombstoned passage ids
+        self._live = (0, 0.0)  # live passages and their average length, for BM25
+        self._open_segments()
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"segments": [], "files": {}, "next_segment": 1}
+
+    def _write_manifest(self):
+        temp_path = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(temp_path, os.path.join(self.path, MANIFEST))
+
+    def _open_segments(self):
+        names = {segment["name"] for segment in self.manifest["segments"]}
+        # Segments dropped by a merge are not closed: a search may still be reading them,
+        # and the mapping goes away with the last reference
+        self.segments = {name: segment for name, segment in self.segments.items() if name in names}
+        for segment in self.manifest["segments"]:
+            if segment["name"] not in self.segments:
+                self.segments[segment["name"]] = Segment(os.path.join(self.path, segment["name"]))
+        self._deleted = {segment["name"]: set(segment["deleted"]) for segment in self.manifest["segments"]}
+        self._live = self._corpus_stats()
+        self._remove_stale_files()
+
+    def _remove_stale_files(self):
+        """Delete segment files no longer in the manifest (e.g. after a merge or a crash)"""
+        for name in os.listdir(self.path):
+            if name.endswith((".seg", ".tmp")) and name not in self.segments:
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except OSError:
+                    pass  # still mapped by another process; removed next time
+
+    def _corpus_stats(self):
+        """(live passages, average passage length) over all segments"""
+        passages = 0
+        tokens = 0
+        for name, segment in self.segments.items():
+            deleted = self._deleted[name]
+            passages += segment.n_docs - len(deleted)
+            tokens += segment.total_tokens - sum(segment.doc_length(doc_id) for doc_id in deleted)
+        return passages, (tokens / passages if passages else 0.0)
+
+    def search(self, query, k=None):
+        """Top `k` passages for `query`: dicts with title, snippet, path and score, best first
+
+        Each source file contributes at most one passage.
+        """
+        k = k or self.max_results
+        started = time.perf_counter()
+        terms = set(tokenize(query))
+        with self._lock:
+            segments = dict(self.segments)
+            deleted = self._deleted
+            passages, avg_length = self._live
+        if not terms or not passages:
+            return []
+
+        scores = {}  # (segment name, passage id) -> score
+        for term in terms:
+            lists = [(name, segment.postings(term)) for name, segment in segments.items()]
+            # Tombstoned passages still count towards df until the next merge
+            df = sum(len(ids) for _, (ids, _) in lists)
+            if not df:
+                continue
+            idf = math.log(1 + (passages - df + 0.5) / (df + 0.5))
+            for name, (ids, tfs) in lists:
+                segment = segments[name]
+                tombstones = deleted[name]
+                for doc_id, tf in zip(ids, tfs):
+                    if doc_id in tombstones:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * segment.doc_length(doc_id) / avg_length)
+                    key = (name, doc_id)
+                    scores[key] = scores.get(key, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        results = []
+        seen_sources = set()
+        # Take a few extra candidates so duplicates from one source can be skipped
+        for (name, doc_id), score in heapq.nlargest(k * 4, scores.items(), key=lambda item: item[1]):
+            segment = segments[name]
+            source = segment.sources[segment.doc_source(doc_id)]
+            if source["path"] in seen_sources:
+                continue
+            seen_sources.add(source["path"])
+            results.append({
+                "title": source["title"],
+                "snippet": best_snippet(segment.text(doc_id), terms, self.snippet_chars),
+                "path": source["path"],
+                "score": round(score, 4),
+            })
+            if len(results) == k:
+                break
+        self.searches += 1
+        self.search_seconds += time.perf_counter() - started
+        return results
+
+    def __call__(self, query):
+        return [{"title": result["title"], "snippet": result["snippet"]} for result in self.search(query)]
+
+    def add_directory(self, root, extensions=DOC_EXTENSIONS):
+        """Index new and changed files under `root` and drop removed ones; returns counts of each"""
+        paths = []
+        for directory, subdirectories, files in os.walk(root):
+            # Never index the index itself
+            subdirectories[:] = [sub for sub in subdirectories if not sub.startswith(".")
+                                 and os.path.abspath(os.path.join(directory, sub)) != os.path.abspath(self.path)]
+            paths.extend(os.path.join(directory, name) for name in files if name.lower().endswith(extensions))
+        root = os.path.abspath(root)
+        known = [path for path in self.manifest["files"] if path.startswith(root + os.sep)]
+        present = {os.path.abspath(path) for path in paths}
+        counts = self.add_files(paths)
+        counts["removed"] = self.remove_files([path for path in known if path not in present])
+        return counts
+
+    def add_files(self, paths):
+        """Index `paths` in one new segment, skipping files unchanged since they were indexed"""
+        counts = {"added": 0, "updated": 0, "unchanged": 0, "passages": 0}
+        sources = []
+        passages = []
+        changed = []
+        for path in paths:
+            path = os.path.abspath(path)
+            stat = os.stat(path)
+            entry = self.manifest["files"].get(path)
+            if entry and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                counts["unchanged"] += 1
+                continue
+            title, text = read_document(path)
+            first = len(passages)
+            passages.extend((len(sources), passage) for passage in split_passages(text, self.passage_words))
+            sources.append({"path": path, "title": title})
+            changed.append((path, stat, title, first, len(passages) - first))
+            counts["updated" if entry else "added"] += 1
+        if not changed:
+            return counts
+
+        with self._lock:
+            name = f"{self.manifest['next_segment']:06d}.seg"
+            self.manifest["next_segment"] += 1
+            written = write_segment(os.path.join(self.path, name), sources, passages)
+            self._tombstone([path for path, *_ in changed])
+            self.manifest["segments"].append({"name": name, "deleted": [], **written})
+            for path, stat, title, first, count in changed:
+                self.manifest["files"][path] = {"mtime": stat.st_mtime, "size": stat.st_size, "title": title,
+                                                "segment": name, "first": first, "count": count}
+            self._write_manifest()
+            self._open_segments()
+        counts["passages"] = len(passages)
+        self._maybe_merge()
+        return counts
+
+    def remove_files(self, paths):
+        """Drop `paths` from the index; returns how many were indexed"""
+        paths = [os.path.abspath(path) for path in paths]
+        with self._lock:
+            removed = self._tombstone(paths)
+            for path in paths:
+                self.manifest["files"].pop(path, None)
+            if removed:
+                self._write_manifest()
+                self._open_segments()
+        if removed:
+            self._maybe_merge()
+        return removed
+
+    def _tombstone(self, paths):
+        """Mark the passages of already indexed `paths` deleted (caller holds the lock)"""
+        tombstoned = 0
+        segments = {segment["name"]: segment for segment in self.manifest["segments"]}
+        for path in paths:
+            entry = self.manifest["files"].get(path)
+            if entry is None or entry["segment"] not in segments:
+                continue
+            segment = segments[entry["segment"]]
+            segment["deleted"] = sorted(set(segment["deleted"]).union(
+                range(entry["first"], entry["first"] + entry["count"])))
+            tombstoned += 1
+        return tombstoned
+
+    def _maybe_merge(self):
+        segments = self.manifest["segments"]
+        docs = sum(segment["docs"] for segment in segments)
+        deleted = sum(len(segment["deleted"]) for segment in segments)
+        if len(segments) > self.max_segments or (docs and deleted / docs > 0.3):
+            self.merge()
+
+    def merge(self):
+        """Rewrite every live passage into a single segment"""
+        with self._lock:
+            sources = []
+            passages = []
+            files = {}
+            for path, entry in self.manifest["files"].items():
+                segment = self.segments[entry["segment"]]
+                first = len(passages)
+                passages.extend((len(sources), segment.text(doc_id))
+                                for doc_id in range(entry["first"], entry["first"] + entry["count"]))
+                sources.append({"path": path, "title": entry["title"]})
+                files[path] = dict(entry, first=first)
+            name = f"{self.manifest['next_segment']:06d}.seg"
+            written = write_segment(os.path.join(self.path, name), sources, passages)
+            for entry in files.values():
+                entry["segment"] = name
+            self.manifest = {"segments": [{"name": name, "deleted": [], **written}], "files": files,
+                             "next_segment": self.manifest["next_segment"] + 1}
+            self._write_manifest()
+            self._open_segments()
+
+    def stats(self):
+        with self._lock:
+            passages, avg_length = self._corpus_stats()
+            return {
+                "files": len(self.manifest["files"]),
+                "passages": passages,
+                "segments": len(self.segments),
+                "avg_passage_tokens": avg_length,
+                "bytes": sum(os.path.getsize(segment.path) for segment in self.segments.values()),
+                "searches": self.searches,
+                "avg_search_ms": self.search_seconds / self.searches * 1000 if self.searches else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            for segment in self.segments.values():
+                segment.close()
+            self.segments = {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help="index directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="index new and changed documents under a directory")
+    build.add_argument("docs", help="directory of documents")
+    build.add_argument("--merge", action="store_true", help="merge all segments into one afterwards")
+    search = commands.add_parser("search", help="print the top passages for a query")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=3, help="number of results")
+    commands.add_parser("stats", help="print index statistics")
+    args = parser.parse_args()
+
+    index = LocalIndex(args.index)
+    try:
+        if args.command == "build":
+            started = time.perf_counter()
+            counts = index.add_directory(args.docs)
+            if args.merge and len(index.segments) > 1:
+                index.merge()
+            print(f"{counts} in {time.perf_counter() - started:.2f}s")
+            print(index.stats())
+        elif args.command == "search":
+            for result in index.search(args.query, args.k):
+                print(f"{result['score']:.2f}  {result['title']} ({result['path']})\n      {result['snippet']}")
+            print(f"{index.search_seconds * 1000:.1f} ms")
+        else:
+            print(json.dumps(index.stats(), indent=2))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
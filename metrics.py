@@ -0,0 +1,196 @@
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Fields of a "turn" record; every duration is in milliseconds
+TURN_FIELDS = (
+    "research_ms", "tags_check_ms", "prompt_build_ms", "ttft_ms", "generation_ms", "total_ms",
+    "tokens", "tokens_per_sec", "prompt_eval_count", "prompt_eval_ms", "eval_count", "eval_ms", "load_ms",
+    "model_wait_ms", "model_swap",
+)
+
+# A turn whose model took longer than this to load had to swap it in (a resident model loads in ~0 ms)
+SWAP_LOAD_MS = 250.0
+
+
+def turn_record(agent, model, **fields):
+    """Build a per-turn metrics record"""
+    record = {"kind": "turn", "time": time.time(), "agent": agent, "model": model}
+    for field in TURN_FIELDS:
+        record[field] = fields.get(field, 0)
+    if "model_swap" not in fields:
+        record["model_swap"] = int(record["load_ms"] >= SWAP_LOAD_MS)
+    record.update({key: value for key, value in fields.items() if key not in record})
+    return record
+
+
+def render_record(agent, lags_ms, tokens, flushes):
+    """Build a GUI render-lag record for one streamed response"""
+    return {
+        "kind": "render",
+        "time": time.time(),
+        "agent": agent,
+        "tokens": tokens,
+        "flushes": flushes,
+        "avg_lag_ms": sum(lags_ms) / len(lags_ms) if lags_ms else 0.0,
+        "max_lag_ms": max(lags_ms) if lags_ms else 0.0,
+    }
+
+
+class InMemorySink:
+    """Keeps the most recent records in memory"""
+
+    def __init__(self, max_records=1000):
+        self.records = collections.deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def turns(self, agent=None):
+        with self._lock:
+            return [r for r in self.records
+                    if r["kind"] == "turn" and (agent is None or r["agent"] == agent)]
+
+    def summary(self):
+        """Average of each turn field per agent, plus model swap and load time totals"""
+        per_agent = {}
+        for record in self.turns():
+            per_agent.setdefault(record["agent"], []).append(record)
+        return {
+            agent: dict({field: sum(r[field] for r in records) / len(records) for field in TURN_FIELDS},
+                        turns=len(records), model_swaps=sum(r["model_swap"] for r in records),
+                        load_ms_total=sum(r["load_ms"] for r in records))
+            for agent, records in per_agent.items()
+        }
+
+
+class JSONLSink:
+    """Appends every record to a JSONL file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class PrometheusSink:
+    """Aggregates records into counters and histograms in Prometheus text format"""
+
+    BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+    HISTOGRAMS = {
+        "total_ms": ("debate_turn_duration_seconds", "End-to-end turn latency"),
+        "ttft_ms": ("debate_time_to_first_token_seconds", "Time from request to first token"),
+        "research_ms": ("debate_research_duration_seconds", "Web research time per turn"),
+        "prompt_eval_ms": ("debate_prompt_eval_duration_seconds", "Ollama prompt evaluation time"),
+        "load_ms": ("debate_model_load_duration_seconds", "Ollama model load time per turn"),
+        "model_wait_ms": ("debate_model_wait_seconds", "Time a turn waited for its model to be scheduled"),
+        "max_lag_ms": ("debate_render_lag_seconds", "Worst delay between a token arriving and being drawn"),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = collections.defaultdict(float)
+        self._histograms = {}
+        self._gauges = {}
+        self._server = None
+
+    def _observe(self, metric, labels, value_ms):
+        key = (metric, labels)
+        with self._lock:
+            histogram = self._histograms.setdefault(key, {"buckets": [0] * len(self.BUCKETS_MS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.BUCKETS_MS):
+                if value_ms <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value_ms / 1000
+            histogram["count"] += 1
+
+    def record(self, record):
+        labels = (("agent", record.get("agent", "")), ("model", record.get("model", "")))
+        for field, (metric, _) in self.HISTOGRAMS.items():
+            if field in record:
+                self._observe(metric, labels, record[field])
+        with self._lock:
+            if record["kind"] == "turn":
+                self._counters[("debate_turns_total", labels)] += 1
+                self._counters[("debate_tokens_total", labels)] += record["tokens"]
+                self._counters[("debate_prompt_eval_tokens_total", labels)] += record["prompt_eval_count"]
+                self._counters[("debate_model_swaps_total", labels)] += record["model_swap"]
+                self._gauges[("debate_tokens_per_second", labels)] = record["tokens_per_sec"]
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = [f'{key}="{value}"' for key, value in tuple(labels) + tuple(extra) if value != ""]
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self):
+        """Return the current state in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name in sorted({metric for metric, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in self._counters.items():
+                    if metric == name:
+                        lines.append(f"{name}{self._labels(labels)} {value:g}")
+            for name in sorted({metric for metric, _ in self._gauges}):
+                lines.append(f"# TYPE {name} gauge")
+                for (metric, labels), value in self._gauges.items():
+                    if metric == name:
+                        lines.append(f"{name}{self._labels(labels)} {value:g}")
+            for field, (name, help_text) in self.HISTOGRAMS.items():
+                series = [(labels, h) for (metric, labels), h in self._histograms.items() if metric == name]
+                if not series:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in series:
+                    for bound, count in zip(self.BUCKETS_MS, histogram["buckets"]):
+                        lines.append(f"{name}_bucket{self._labels(labels, (('le', f'{bound / 1000:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{self._labels(labels, (('le', '+Inf'),))} {histogram['count']}")
+                    lines.append(f"{name}_sum{self._labels(labels)} {histogram['sum']:g}")
+                    lines.append(f"{name}_count{self._labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the exposition text to a file (e.g. for node_exporter's textfile collector)"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """Expose /metrics over HTTP from a background thread"""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+class MultiSink:
+    """Fans records out to several sinks"""
+
+    def __init__(self, *sinks):
+        self.sinks = list(sinks)
+
+    def record(self, record):
+        for sink in self.sinks:
+            sink.record(record)
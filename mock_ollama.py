@@ -0,0 +1,330 @@
+"""Local stand-in for the Ollama HTTP API, for benchmarks and offline runs
+
+Implements /api/tags, /api/generate and /api/chat with NDJSON streaming.
+Time to first token, tokens per second, prompt evaluation cost, model load
+time and error injection are configurable, so the generation path can be
+measured without a real model.
+
+    python mock_ollama.py --port 11434 --ttft 0.2 --tps 40
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("the evidence suggests that we should consider how systems learn and adapt while "
+         "accounting for human values in every decision we make about technology").split()
+
+
+def count_tokens(text):
+    """Rough token count used for prompt evaluation timing (about 4 chars per token)"""
+    return max(1, len(text) // 4) if text else 0
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, payload):
+        line = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def do_GET(self):
+        server = self.server.mock
+        if self.path.rstrip("/") == "/api/tags":
+            server.count("tags")
+            self._send_json(200, {"models": [{"name": name, "model": name} for name in server.models]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        server = self.server.mock
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        path = self.path.rstrip("/")
+        if path not in ("/api/generate", "/api/chat"):
+            self._send_json(404, {"error": "not found"})
+            return
+        server.count(path.rsplit("/", 1)[-1])
+
+        model = request.get("model", "")
+        if model not in server.models:
+            self._send_json(404, {"error": f"model '{model}' not found, try pulling it first"})
+            return
+        if server.should_fail():
+            server.count("errors")
+            self._send_json(500, {"error": "injected failure"})
+            return
+        if server.slots is None:
+            server.generate(self, path == "/api/chat", request)
+            return
+        # Like OLLAMA_NUM_PARALLEL: extra requests queue until a slot frees up
+        with server.slots:
+            server.generate(self, path == "/api/chat", request)
+
+
+class MockOllamaServer:
+    """Threaded mock Ollama server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, host="127.0.0.1", port=0, models=("dolphin-mixtral:latest",), ttft=0.05,
+                 tokens_per_second=50.0, response_tokens=40, prompt_eval_per_token=0.0002,
+                 load_time=0.0, max_loaded_models=1, error_rate=0.0, stream_error_rate=0.0, seed=None,
+                 num_parallel=0):
+        self.models = list(models)
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        self.prompt_eval_per_token = prompt_eval_per_token
+        self.load_time = load_time
+        self.max_loaded_models = max_loaded_models
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.random = random.Random(seed)
+        self.slots = threading.BoundedSemaphore(num_parallel) if num_parallel else None  # 0: unlimited
+        self.loaded = []  # most recently used last
+        self.active = {}  # model -> requests using it; a model in use is never evicted
+        self.pending = []  # requests waiting to be scheduled, first come first served
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._unloadable = threading.Condition(self._lock)
+        self.httpd = ThreadingHTTPServer((host, port), MockOllamaHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def should_fail(self):
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+    def _load(self, model):
+        """Simulate Ollama keeping a limited number of models resident
+
+        Like Ollama's scheduler, requests are admitted in arrival order, and
+        one for a model that is not loaded waits until a loaded model has no
+        requests running, then evicts it; the requests behind it wait too.
+        """
+        ticket = object()
+        with self._unloadable:
+            self.pending.append(ticket)
+            while True:
+                if self.pending[0] is ticket:
+                    if model in self.loaded or len(self.loaded) < self.max_loaded_models:
+                        break
+                    idle = [loaded for loaded in self.loaded if not self.active.get(loaded)]
+                    if idle:
+                        self.loaded.remove(idle[0])
+                        break
+                self._unloadable.wait()
+            self.pending.pop(0)
+            self._unloadable.notify_all()
+            self.active[model] = self.active.get(model, 0) + 1
+            if model in self.loaded:
+                self.loaded.remove(model)
+                self.loaded.append(model)
+                return 0.0
+            self.loaded.append(model)
+            self.stats["loads"] = self.stats.get("loads", 0) + 1
+        if self.load_time:
+            time.sleep(self.load_time)
+        return self.load_time
+
+    def _release(self, model):
+        with self._unloadable:
+            self.active[model] -= 1
+            self._unloadable.notify_all()
+
+    def _prompt_tokens(self, chat, request):
+        if chat:
+            # A real server reuses its KV cache for an unchanged message prefix; model
+            # that by only counting the newest message
+            messages = request.get("messages", [])
+            total = sum(count_tokens(m.get("content", "")) for m in messages)
+            new = count_tokens(messages[-1].get("content", "")) if messages else 0
+            return total, new
+        prompt_tokens = count_tokens(request.get("prompt", "")) + count_tokens(request.get("system", ""))
+        context = request.get("context") or []
+        return len(context) + prompt_tokens, prompt_tokens
+
+    def generate(self, handler, chat, request):
+        model = request["model"]
+        load_seconds = self._load(model)
+        try:
+            self._generate(handler, chat, request, load_seconds)
+        finally:
+            self._release(model)
+
+    def _generate(self, handler, chat, request, load_seconds):
+        model = request["model"]
+        options = request.get("options") or {}
+        stream = request.get("stream", True)
+        num_predict = options.get("num_predict", -1)
+        n_tokens = self.response_tokens if num_predict is None or num_predict < 0 else min(num_predict, self.response_tokens)
+        stops = options.get("stop") or []
+
+        if not chat and not request.get("prompt"):
+            # Like Ollama, an empty prompt only loads the model (used to warm it up)
+            self.count("warm_ups")
+            handler._send_json(200, {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                     "response": "", "done": True, "done_reason": "load",
+                                     "load_duration": int(load_seconds * 1e9),
+                                     "total_duration": int(load_seconds * 1e9)})
+            return
+        total_tokens, new_tokens = self._prompt_tokens(chat, request)
+        prompt_eval = new_tokens * self.prompt_eval_per_token
+        started = time.perf_counter()
+        time.sleep(max(self.ttft, prompt_eval))
+
+        seed = options.get("seed")
+        rng = random.Random(seed) if seed is not None else self.random
+        fail_at = -1
+        if self.stream_error_rate and rng.random() < self.stream_error_rate:
+            fail_at = rng.randrange(max(1, n_tokens))
+
+        def text_chunk(text):
+            chunk = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"), "done": False}
+            if chat:
+                chunk["message"] = {"role": "assistant", "content": text}
+            else:
+                chunk["response"] = text
+            return chunk
+
+        pieces = []
+        for i in range(n_tokens):
+            word = rng.choice(WORDS)
+            piece = (" " if i else "") + word + ("." if i % 12 == 11 else "")
+            pieces.append(piece)
+        tokens = []
+        text_so_far = ""
+        for piece in pieces:
+            text_so_far += piece
+            tokens.append(piece)
+            if any(stop in text_so_far for stop in stops):
+                break
+
+        eval_started = time.perf_counter()
+        interval = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        if stream:
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/x-ndjson")
+            handler.send_header("Transfer-Encoding", "chunked")
+            handler.end_headers()
+        try:
+            for i, piece in enumerate(tokens):
+                if i == fail_at:
+                    self.count("stream_errors")
+                    if stream:
+                        handler._write_chunk({"error": "injected stream failure"})
+                        handler.wfile.write(b"0\r\n\r\n")
+                    else:
+                        handler._send_json(500, {"error": "injected stream failure"})
+                    return
+                if stream:
+                    handler._write_chunk(text_chunk(piece))
+                if interval:
+                    time.sleep(interval)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away (e.g. a cancelled turn); stop "generating"
+            self.count("aborted")
+            return
+        self.count("tokens", len(tokens))
+
+        eval_ns = int((time.perf_counter() - eval_started) * 1e9)
+        final = text_chunk("")
+        final.update({
+            "done": True,
+            "done_reason": "stop" if len(tokens) < n_tokens else "length",
+            "total_duration": int((time.perf_counter() - started) * 1e9) + int(load_seconds * 1e9),
+            "load_duration": int(load_seconds * 1e9),
+            "prompt_eval_count": new_tokens,
+            "prompt_eval_duration": int(prompt_eval * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": eval_ns,
+        })
+        if not chat:
+            final["context"] = list(range(total_tokens + len(tokens)))
+        if stream:
+            handler._write_chunk(final)
+            handler.wfile.write(b"0\r\n\r\n")
+            handler.wfile.flush()
+        else:
+            if chat:
+                final["message"] = {"role": "assistant", "content": "".join(tokens)}
+            else:
+                final["response"] = "".join(tokens)
+            handler._send_json(200, final)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--model", action="append", dest="models", help="model name to advertise (repeatable)")
+    parser.add_argument("--ttft", type=float, default=0.05, help="seconds before the first token")
+    parser.add_argument("--tps", type=float, default=50.0, help="tokens per second")
+    parser.add_argument("--tokens", type=int, default=40, help="tokens per response")
+    parser.add_argument("--prompt-eval", type=float, default=0.0002, help="seconds per new prompt token")
+    parser.add_argument("--load-time", type=float, default=0.0, help="seconds to load a model that is not resident")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with HTTP 500")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="fraction of streams failing midway")
+    parser.add_argument("--num-parallel", type=int, default=0,
+                        help="generations served at once, others queue (0: unlimited)")
+    args = parser.parse_args()
+
+    server = MockOllamaServer(args.host, args.port, models=args.models or ["dolphin-mixtral:latest"],
+                              ttft=args.ttft, tokens_per_second=args.tps, response_tokens=args.tokens,
+                              prompt_eval_per_token=args.prompt_eval, load_time=args.load_time,
+                              error_rate=args.error_rate, stream_error_rate=args.stream_error_rate,
+                              num_parallel=args.num_parallel)
+    print(f"Mock Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
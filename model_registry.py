@@ -0,0 +1,110 @@
+import threading
+import time
+import weakref
+
+
+class ModelRegistry:
+    """TTL cache of the models an Ollama host has available, shared across agents"""
+
+    def __init__(self, client, ttl=60.0):
+        self.client = client
+        self.ttl = ttl
+        self._models = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._stop_event = threading.Event()
+        self._refresh_thread = None
+        self.hits = 0
+        self.refreshes = 0
+
+    def _is_fresh(self):
+        return self._models is not None and (time.monotonic() - self._fetched_at) < self.ttl
+
+    def refresh(self):
+        """Fetch /api/tags now and replace the cached model list"""
+        tags = self.client.get_tags()
+        names = [m['name'] for m in tags.get('models', [])]
+        with self._lock:
+            self._models = names
+            self._fetched_at = time.monotonic()
+            self.refreshes += 1
+        return list(names)
+
+    def _refresh_async(self):
+        """Refresh in a background thread, at most one at a time"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def worker():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Model registry refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def models(self):
+        """Return the available model names, only blocking when nothing is cached yet"""
+        with self._lock:
+            cached = self._models
+            fresh = self._is_fresh()
+        if cached is None:
+            return self.refresh()
+        if not fresh:
+            # Serve the stale list and update it off the critical path
+            self._refresh_async()
+        with self._lock:
+            self.hits += 1
+        return list(cached)
+
+    def has_model(self, name):
+        if name in self.models():
+            return True
+        # A model may have been pulled since the last refresh
+        return name in self.refresh()
+
+    def invalidate(self):
+        """Forget the cached list, e.g. after Ollama reports a missing model"""
+        with self._lock:
+            self._models = None
+            self._fetched_at = 0.0
+
+    def start_background_refresh(self, interval=None):
+        """Keep the cache warm by refreshing every `interval` seconds (defaults to the TTL)"""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        interval = interval or self.ttl
+        self._stop_event.clear()
+
+        def loop():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Model registry refresh failed: {e}")
+
+        self._refresh_thread = threading.Thread(target=loop, daemon=True)
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop_event.set()
+
+
+_registries = weakref.WeakKeyDictionary()
+_registries_lock = threading.Lock()
+
+
+def get_registry(client):
+    """Return the registry shared by every agent using `client`"""
+    with _registries_lock:
+        registry = _registries.get(client)
+        if registry is None:
+            registry = ModelRegistry(client)
+            _registries[client] = registry
+        return registry
@@ -0,0 +1,173 @@
+"""Keeping model swaps on an Ollama host to a minimum
+
+An Ollama host keeps only a few models in memory (OLLAMA_MAX_LOADED_MODELS).
+When debates use different models, each turn on a model that is not
+resident evicts another one and waits seconds for the load. Two tools help:
+
+- warm_up() loads every model a run needs before the first turn and asks
+  Ollama to keep it resident for `keep_alive`
+- ModelSwapScheduler makes concurrent debates take turns by model: while a
+  model is resident, its pending turns run back to back, and the others
+  wait for a group switch instead of forcing a swap on every turn
+
+Every request to a scheduled host goes through the scheduler, not only the
+speakers' turns: judge, summary, moderator and context checkpoint calls
+hold the model the same way (see model_turn()).
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+
+
+def warm_up(client, models, keep_alive="30m"):
+    """Load `models` on every host behind `client`; returns {model: load_ms or None if it failed}
+
+    An empty prompt makes Ollama load the model without generating anything.
+    With a backend_pool.BackendPool each host that has the model is warmed.
+    """
+    clients = [backend.client for backend in getattr(client, "backends", [])
+               if backend.healthy] or [client]
+    loaded = {}
+    for model in dict.fromkeys(models):
+        for host in clients:
+            backend = next((b for b in getattr(client, "backends", []) if b.client is host), None)
+            if backend is not None and not backend.has_model(model):
+                continue
+            started = time.perf_counter()
+            try:
+                response = host.generate({"model": model, "prompt": "", "stream": False,
+                                          "keep_alive": keep_alive}, stream=False)
+                final = response.json()
+                load_ms = final.get("load_duration", 0) / 1e6
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"Warm-up of {model} on {host.base_url} failed: {str(e)}")
+                loaded.setdefault(model, None)
+                continue
+            loaded[model] = max(loaded.get(model) or 0.0, load_ms)
+            print(f"Warmed up {model} on {host.base_url} in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return loaded
+
+
+class ModelSwapScheduler:
+    """Admits turns so that models are swapped in groups rather than per turn
+
+    `max_loaded_models` is how many models the host keeps resident at once.
+    A turn for a resident model starts at once. A turn for another model
+    waits until a resident model has no turns running and no turns waiting,
+    then swaps in, chosen by how many turns want it. So no turn starves, a
+    model that has been wanted for `max_wait` seconds stops the resident
+    models from admitting new turns until one of them drains.
+
+    `acquire()` blocks and returns the seconds waited (None if
+    `cancel_token` was cancelled first); `release()` must follow every
+    successful acquire.
+    """
+
+    def __init__(self, max_loaded_models=1, max_wait=30.0):
+        self.max_loaded_models = max_loaded_models
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self.resident = []  # least recently used first
+        self.active = {}  # model -> turns running
+        self.waiting = {}  # model -> arrival times of turns waiting
+        self.loads = 0
+        self.swaps = 0
+        self.turns = 0
+        self.wait_seconds = 0.0
+
+    def _starving(self, now):
+        """Non-resident models that have waited longer than max_wait, oldest first"""
+        starving = [(min(arrivals), model) for model, arrivals in self.waiting.items()
+                    if model not in self.resident and arrivals and now - min(arrivals) >= self.max_wait]
+        return [model for _, model in sorted(starving)]
+
+    def _next_swap_in(self, now):
+        """The non-resident model that gets the next free slot"""
+        starving = self._starving(now)
+        if starving:
+            return starving[0]
+        candidates = [(len(arrivals), -min(arrivals), model) for model, arrivals in self.waiting.items()
+                      if model not in self.resident and arrivals]
+        return max(candidates)[2] if candidates else None
+
+    def _admit(self, model, now):
+        if model in self.resident:
+            # Hold back new turns while another model starves, so this one drains
+            return not self._starving(now)
+        if self._next_swap_in(now) != model:
+            return False
+        if len(self.resident) < self.max_loaded_models:
+            self.resident.append(model)
+            self.loads += 1
+            return True
+        idle = [resident for resident in self.resident if not self.active.get(resident)]
+        # Prefer evicting a model nobody is waiting for; evict a wanted one only for a starving model
+        unwanted = [resident for resident in idle if not self.waiting.get(resident)]
+        if unwanted:
+            victim = unwanted[0]
+        elif idle and model in self._starving(now):
+            victim = idle[0]
+        else:
+            return False
+        self.resident.remove(victim)
+        self.resident.append(model)
+        self.loads += 1
+        self.swaps += 1
+        return True
+
+    def acquire(self, model, cancel_token=None):
+        arrival = time.monotonic()
+        with self._cond:
+            self.waiting.setdefault(model, []).append(arrival)
+            try:
+                while not self._admit(model, time.monotonic()):
+                    if cancel_token is not None and cancel_token.is_set():
+                        return None
+                    # Time-based conditions (max_wait, cancellation) need a periodic recheck
+                    self._cond.wait(0.25)
+            finally:
+                self.waiting[model].remove(arrival)
+                if not self.waiting[model]:
+                    del self.waiting[model]
+            self.active[model] = self.active.get(model, 0) + 1
+            self.resident.remove(model)
+            self.resident.append(model)
+            waited = time.monotonic() - arrival
+            self.turns += 1
+            self.wait_seconds += waited
+            return waited
+
+    def release(self, model):
+        with self._cond:
+            self.active[model] -= 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "turns": self.turns,
+                "loads": self.loads,
+                "swaps": self.swaps,
+                "avg_wait_ms": self.wait_seconds / self.turns * 1000 if self.turns else 0.0,
+                "resident": list(self.resident),
+            }
+
+
+@contextmanager
+def model_turn(scheduler, model, cancel_token=None):
+    """Hold `model` on `scheduler` around one request; yields the seconds waited
+
+    Yields None if `cancel_token` was cancelled before the model was admitted,
+    in which case nothing should be sent. Without a scheduler it yields 0.0.
+    """
+    if scheduler is None:
+        yield 0.0
+        return
+    waited = scheduler.acquire(model, cancel_token)
+    try:
+        yield waited
+    finally:
+        if waited is not None:
+            scheduler.release(model)
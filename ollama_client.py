@@ -0,0 +1,150 @@
+import socket
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+
+def _counting_pool(pool_cls, on_connect):
+    """Subclass of a urllib3 connection pool whose connections call `on_connect` per TCP connect"""
+    class CountingConnection(pool_cls.ConnectionCls):
+        def connect(self):
+            super().connect()
+            on_connect()
+
+    return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": CountingConnection})
+
+
+class CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts real connects, so connection reuse can be measured
+
+    urllib3's pool statistics count connection objects, and one object can
+    reconnect many times (e.g. after the server closed it), so they overstate reuse.
+    """
+
+    def __init__(self, **kwargs):
+        self.connects = 0
+        self._connects_lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def _count_connect(self):
+        with self._connects_lock:
+            self.connects += 1
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool(pool_cls, self._count_connect)
+            for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class OllamaClient:
+    """Shared HTTP client for Ollama that keeps pooled keep-alive connections"""
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, connect_timeout=3.05, read_timeout=120,
+                 pool_connections=4, pool_maxsize=16):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # One session per client so every agent reuses the same connection pool
+        self.session = requests.Session()
+        self.adapter = CountingAdapter(pool_connections=pool_connections,
+                                       pool_maxsize=pool_maxsize,
+                                       pool_block=False)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self._lock = threading.Lock()
+        self.request_count = 0
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def _count_request(self):
+        with self._lock:
+            self.request_count += 1
+
+    def get(self, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        self._count_request()
+        return self.session.get(self.url(path), **kwargs)
+
+    def post(self, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        self._count_request()
+        return self.session.post(self.url(path), **kwargs)
+
+    def get_tags(self):
+        """Return the parsed /api/tags listing"""
+        response = self.get("/api/tags")
+        response.raise_for_status()
+        return response.json()
+
+    def generate(self, data, stream=True):
+        """Start a /api/generate request and return the (streaming) response"""
+        response = self.post("/api/generate", json=data, stream=stream)
+        if not response.ok:
+            # Read the short error body and release the connection to the pool before raising
+            response.content
+            response.close()
+            response.raise_for_status()
+        return response
+
+    @staticmethod
+    def abort(response):
+        """Tear down a streaming response from any thread
+
+        Shutting the socket down wakes a reader blocked in iter_content and tells
+        Ollama the client went away, so it stops generating. The reading thread
+        still closes the response itself; the broken connection is discarded
+        rather than returned to the pool.
+        """
+        connection = getattr(response.raw, "_connection", None)
+        sock = getattr(connection, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def pool_stats(self):
+        """Report how many TCP connections were opened versus requests sent"""
+        pools = self.adapter.poolmanager.pools
+        connections = self.adapter.connects
+        pool_requests = 0
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            pool_requests += pool.num_requests
+        return {
+            "base_url": self.base_url,
+            "requests": self.request_count,
+            "connections_opened": connections,
+            "pool_requests": pool_requests,
+            "reuse_ratio": (1 - connections / pool_requests) if pool_requests else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_default_client():
+    """Return the process-wide client used when an agent is not given one"""
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = OllamaClient()
+        return _default_client
@@ -0,0 +1,54 @@
+import threading
+
+PACING_MODES = ("none", "fixed", "reading")
+
+
+class PacingPolicy:
+    """Decides how long to pause between debate turns
+
+    Modes:
+    - "none": no delay, for headless and batch runs
+    - "fixed": always `delay` seconds
+    - "reading": long enough to read the previous response at `words_per_minute`,
+      clamped to [min_delay, max_delay]
+    """
+
+    def __init__(self, mode="fixed", delay=2.0, words_per_minute=250, min_delay=0.5, max_delay=15.0):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Pacing mode must be one of {PACING_MODES}")
+        self.mode = mode
+        self.delay = delay
+        self.words_per_minute = words_per_minute
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def none(cls):
+        return cls("none")
+
+    @classmethod
+    def fixed(cls, delay=2.0):
+        return cls("fixed", delay=delay)
+
+    @classmethod
+    def reading(cls, words_per_minute=250, min_delay=0.5, max_delay=15.0):
+        return cls("reading", words_per_minute=words_per_minute, min_delay=min_delay, max_delay=max_delay)
+
+    def delay_for(self, previous_response=""):
+        """Seconds to wait after `previous_response` was shown"""
+        if self.mode == "none":
+            return 0.0
+        if self.mode == "fixed":
+            return self.delay
+        words = len((previous_response or "").split())
+        seconds = words / self.words_per_minute * 60
+        return max(self.min_delay, min(self.max_delay, seconds))
+
+    def wait(self, previous_response="", stop_event=None):
+        """Pause between turns; returns False if `stop_event` interrupted the wait"""
+        seconds = self.delay_for(previous_response)
+        if stop_event is None:
+            stop_event = threading.Event()
+        if seconds <= 0:
+            return not stop_event.is_set()
+        return not stop_event.wait(seconds)
@@ -0,0 +1,207 @@
+"""Session profiler writing Chrome trace-event JSON
+
+Spans recorded with `span()` from any thread end up on that thread's track
+when the trace is opened in chrome://tracing or https://ui.perfetto.dev.
+Tracing is off by default and `span()` is then a no-op, so call sites can
+stay in the hot path.
+
+    tracer = profiler.enable(sample_stacks=True)
+    ...
+    tracer.write("debate_trace.json")   # also writes debate_trace.json.folded
+
+With `sample_stacks`, a background thread samples every thread's Python
+stack; the samples go into the trace and into a folded-stacks file that
+flamegraph.pl or speedscope can render directly.
+"""
+import collections
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.cat, self.start, time.perf_counter(), self.args)
+        return False
+
+
+class StackSampler:
+    """Periodically samples the Python stack of every thread"""
+
+    def __init__(self, tracer, interval=0.005):
+        self.tracer = tracer
+        self.interval = interval
+        self.folded = collections.Counter()  # "thread;outer;...;inner" -> sample count
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self.folded[";".join([names.get(ident, str(ident))] + stack)] += 1
+                self.tracer.sample(ident, now, stack)
+            self.sample_count += 1
+
+    def write_folded(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.folded.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Tracer:
+    """Collects spans, instant events and stack samples from all threads"""
+
+    def __init__(self):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.sampler = None
+        self._lock = threading.Lock()
+        self._thread_names = {}
+        self._frames = {}  # (parent id, frame name) -> stack frame id
+        self._stack_frames = {}
+        self._samples = []
+
+    def _ts(self, t):
+        return (t - self.origin) * 1e6  # trace timestamps are in microseconds
+
+    def _tid(self):
+        thread = threading.current_thread()
+        if thread.ident not in self._thread_names:
+            self._thread_names[thread.ident] = thread.name
+        return thread.ident
+
+    def span(self, name, cat="debate", **args):
+        """Context manager timing a block as a complete ("X") event"""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _Span(self, name, cat, args)
+
+    def complete(self, name, cat, start, end, args=None):
+        event = {"name": name, "cat": cat, "ph": "X", "ts": self._ts(start), "dur": (end - start) * 1e6,
+                 "pid": self.pid, "tid": self._tid()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def instant(self, name, cat="debate", **args):
+        if not self.enabled:
+            return
+        event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self._ts(time.perf_counter()),
+                 "pid": self.pid, "tid": self._tid()}
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def sample(self, tid, t, stack):
+        with self._lock:
+            parent = None
+            for frame_name in stack:
+                key = (parent, frame_name)
+                frame_id = self._frames.get(key)
+                if frame_id is None:
+                    frame_id = self._frames[key] = len(self._frames) + 1
+                    self._stack_frames[str(frame_id)] = {"name": frame_name, "category": "python"}
+                    if parent is not None:
+                        self._stack_frames[str(frame_id)]["parent"] = str(parent)
+                parent = frame_id
+            if parent is not None:
+                self._samples.append({"cpu": 0, "tid": tid, "ts": self._ts(t), "name": "sample",
+                                      "sf": str(parent), "weight": 1})
+
+    def start_sampling(self, interval=0.005):
+        if self.sampler is None:
+            self.sampler = StackSampler(self, interval).start()
+
+    def stop(self):
+        self.enabled = False
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def trace(self):
+        """The trace as a Chrome trace-event JSON object"""
+        with self._lock:
+            events = list(self.events)
+            names = dict(self._thread_names)
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for ident, name in names.items():
+                events.append({"name": "thread_name", "ph": "M", "pid": self.pid, "tid": ident,
+                               "args": {"name": name}})
+            trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+            if self._samples:
+                trace["stackFrames"] = dict(self._stack_frames)
+                trace["samples"] = list(self._samples)
+        return trace
+
+    def write(self, path):
+        """Write the Chrome trace (and folded stacks, if sampling) to `path`"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace(), f)
+        if self.sampler is not None:
+            self.sampler.write_folded(path + ".folded")
+        return path
+
+
+_tracer = Tracer()
+
+
+def get_tracer():
+    return _tracer
+
+
+def enable(sample_stacks=False, interval=0.005):
+    """Start recording spans (and optionally stack samples) for this process"""
+    _tracer.enabled = True
+    if sample_stacks:
+        _tracer.start_sampling(interval)
+    return _tracer
+
+
+def span(name, cat="debate", **args):
+    return _tracer.span(name, cat, **args)
+
+
+def instant(name, cat="debate", **args):
+    _tracer.instant(name, cat, **args)
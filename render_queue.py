@@ -0,0 +1,124 @@
+import collections
+import threading
+import time
+
+import profiler
+
+
+class RenderQueue:
+    """Collects streamed text from worker threads and flushes it to Tk at a fixed frame rate
+
+    Workers call push_delta/push_end/push_message from any thread. The Tk main
+    loop drains the queue every `interval_ms`, merging consecutive deltas for the
+    same speaker into a single insert, and hands the merged segments to `render`.
+    """
+
+    def __init__(self, root, render, interval_ms=40):
+        self.root = root
+        self.render = render
+        self.interval_ms = interval_ms
+        self._events = collections.deque()
+        self._lock = threading.Lock()
+        self._after_id = None
+        self.running = False
+
+        # Flush statistics
+        self.flush_count = 0
+        self.token_count = 0
+        self.last_flush_tokens = 0
+        self.max_flush_tokens = 0
+        self._speaker_stats = {}  # name -> render lag samples for the current response
+
+    def push_delta(self, name, text):
+        self._events.append(("delta", name, text, time.perf_counter()))
+
+    def push_end(self, name):
+        self._events.append(("end", name, "", time.perf_counter()))
+
+    def push_message(self, name, text):
+        self._events.append(("message", name, text, time.perf_counter()))
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        self.running = False
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _drain(self):
+        """Pop everything queued so far and merge adjacent deltas per speaker"""
+        segments = []
+        tokens = 0
+        oldest = {}  # name -> enqueue time of the oldest delta in this flush
+        counts = collections.Counter()
+        events = self._events
+        while events:
+            kind, name, text, queued_at = events.popleft()
+            if kind == "delta":
+                tokens += 1
+                counts[name] += 1
+                oldest.setdefault(name, queued_at)
+                if segments and segments[-1][0] == "delta" and segments[-1][1] == name:
+                    segments[-1][2].append(text)
+                    continue
+                segments.append(["delta", name, [text]])
+            else:
+                segments.append([kind, name, text])
+        for segment in segments:
+            if segment[0] == "delta":
+                segment[2] = "".join(segment[2])
+        return segments, tokens, oldest, counts
+
+    def flush(self):
+        """Render everything pending now; returns the number of tokens merged"""
+        with self._lock:
+            segments, tokens, oldest, counts = self._drain()
+        if not segments:
+            return 0
+        
+        # Lag is measured from the oldest token in the batch to the moment it is drawn
+        now = time.perf_counter()
+        for name, queued_at in oldest.items():
+            stats = self._speaker_stats.setdefault(name, {"lags_ms": [], "tokens": 0, "flushes": 0})
+            stats["lags_ms"].append((now - queued_at) * 1000)
+            stats["tokens"] += counts[name]
+            stats["flushes"] += 1
+        
+        self.render(segments)
+        self.flush_count += 1
+        self.token_count += tokens
+        self.last_flush_tokens = tokens
+        self.max_flush_tokens = max(self.max_flush_tokens, tokens)
+        return tokens
+
+    def pop_speaker_stats(self, name):
+        """Render lag samples and token count for `name` since the last call"""
+        return self._speaker_stats.pop(name, {"lags_ms": [], "tokens": 0, "flushes": 0})
+
+    def _tick(self):
+        if not self.running:
+            return
+        try:
+            with profiler.span("tk.after render_flush", cat="tk") as span:
+                tokens = self.flush()
+                if tokens and span is not None:
+                    span.args["tokens"] = tokens
+        finally:
+            if self.running:
+                self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stats(self):
+        return {
+            "flushes": self.flush_count,
+            "tokens": self.token_count,
+            "last_flush_tokens": self.last_flush_tokens,
+            "max_flush_tokens": self.max_flush_tokens,
+            "avg_tokens_per_flush": self.token_count / self.flush_count if self.flush_count else 0.0,
+        }
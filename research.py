@@ -0,0 +1,346 @@
+import collections
+import json
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import profiler
+
+RESEARCH_BACKENDS = ("web", "local")
+
+
+def format_research(research_data):
+    """Format research results for the prompt"""
+    if not research_data:
+        return ""
+    research_text = "\nRecent relevant information:\n"
+    for data in research_data:
+        research_text += f"- {data['title']}: {data['snippet']}\n"
+    return research_text
+
+
+def research_query(topic, message, max_chars=200):
+    """Search query for a turn: the topic plus the first sentence of the message
+
+    Only the first sentence is used so the next speaker's query can be formed
+    (and prefetched) while the current speaker is still generating.
+    """
+    match = re.search(r"[.!?](\s|$)", message)
+    first_sentence = message[:match.end()] if match else message
+    return f"{topic} {first_sentence.strip()[:max_chars]}".strip()
+
+
+def first_sentence_complete(text):
+    """Whether streamed `text` holds a whole first sentence
+
+    The end mark must be followed by whitespace: text still streaming in may
+    continue right after it (e.g. "3." then "5%").
+    """
+    return re.search(r"[.!?]\s", text) is not None
+
+
+def normalize_query(query):
+    """Cache key for a search query: case, punctuation and spacing don't matter"""
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+class DuckDuckGoFetcher:
+    """Fetch and parse DuckDuckGo's HTML results page"""
+
+    def __init__(self, url="https://duckduckgo.com/html/", session=None, timeout=(3.05, 10), max_results=3):
+        self.url = url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.max_results = max_results
+
+    def __call__(self, query):
+        headers = {"User-Agent": "Mozilla/5.0"}
+        params = {"q": query}
+        with profiler.span("research.http", cat="research", query=query):
+            response = self.session.get(self.url, headers=headers, params=params, timeout=self.timeout)
+        if response.status_code != 200:
+            return []
+
+        # Extract relevant information from search results
+        from bs4 import BeautifulSoup
+        with profiler.span("research.parse", cat="research", bytes=len(response.content)):
+            soup = BeautifulSoup(response.text, 'html.parser')
+            results = soup.find_all('div', {'class': 'result'})
+
+            research_data = []
+            for result in results[:self.max_results]:
+                title = result.find('a', {'class': 'result__a'})
+                snippet = result.find('div', {'class': 'result__snippet'})
+                if title and snippet:
+                    research_data.append({
+                        'title': title.text.strip(),
+                        'snippet': snippet.text.strip()
+                    })
+        return research_data
+
+
+class ResearchCache:
+    """LRU + TTL cache of research results with an optional SQLite tier
+
+    `fetcher` is any callable taking a query and returning a list of
+    {'title', 'snippet'} dicts, so tests can point it at a local fixture server.
+    """
+
+    def __init__(self, fetcher=None, max_entries=256, ttl=6 * 3600, db_path=None, prefetch_workers=2):
+        self.fetcher = fetcher or DuckDuckGoFetcher()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._memory = collections.OrderedDict()  # key -> (fetched_at, results)
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future for prefetches still running
+        self._prefetch_workers = prefetch_workers
+        self._executor = None
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS research "
+                             "(key TEXT PRIMARY KEY, results TEXT NOT NULL, fetched_at REAL NOT NULL)")
+            self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.prefetches = 0
+        self.inflight_waits = 0
+
+    def _remember(self, key, fetched_at, results):
+        self._memory[key] = (fetched_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, query, count_hit=True):
+        """Return cached results for `query`, or None on a miss"""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += count_hit
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT results, fetched_at FROM research WHERE key = ?",
+                                       (key,)).fetchone()
+                if row is not None:
+                    if now - row[1] < self.ttl:
+                        results = json.loads(row[0])
+                        self._remember(key, row[1], results)
+                        self.disk_hits += count_hit
+                        return results
+                    self._db.execute("DELETE FROM research WHERE key = ?", (key,))
+                    self._db.commit()
+        return None
+
+    def store(self, query, results):
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, results)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO research (key, results, fetched_at) VALUES (?, ?, ?)",
+                                 (key, json.dumps(results), now))
+                self._db.commit()
+
+    def _fetch(self, query):
+        try:
+            with profiler.span("research.fetch", cat="research", query=query):
+                results = self.fetcher(query)
+        except Exception as e:
+            # Failures are not cached so the next turn retries
+            print(f"Research error: {str(e)}")
+            with self._lock:
+                self.errors += 1
+            return []
+        self.store(query, results)
+        return results
+
+    def get(self, query, cancel_token=None):
+        """Return results for `query`, fetching and caching them on a miss
+
+        With a `cancel_token`, the fetch runs on the worker pool and the caller
+        stops waiting (getting no results) as soon as the token is cancelled;
+        the fetch itself finishes in the background and is still cached.
+        """
+        results = self.lookup(query)
+        if results is not None:
+            return results
+
+        with self._lock:
+            future = self._inflight.get(normalize_query(query))
+            if future is not None:
+                self.inflight_waits += 1
+            else:
+                self.misses += 1
+        if future is not None:
+            # A prefetch for this query is already running; wait for it
+            return self._wait(future, cancel_token)
+        if cancel_token is None:
+            return self._fetch(query)
+        return self._wait(self._submit(query), cancel_token)
+
+    def _wait(self, future, cancel_token):
+        if cancel_token is None:
+            return future.result()
+        finished = threading.Event()
+        future.add_done_callback(lambda _: finished.set())
+        handle = cancel_token.on_cancel(finished.set)
+        try:
+            finished.wait()
+        finally:
+            cancel_token.remove(handle)
+        return future.result() if future.done() else []
+
+    def _submit(self, query):
+        """Run a fetch on the worker pool, joining one already in flight for the same query"""
+        key = normalize_query(query)
+        with self._lock:
+            if key in self._inflight:
+                return self._inflight[key]
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._prefetch_workers,
+                                                    thread_name_prefix="research-prefetch")
+            future = self._executor.submit(self._fetch, query)
+            self._inflight[key] = future
+
+        def done(_):
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        future.add_done_callback(done)
+        return future
+
+    def prefetch(self, query):
+        """Start fetching `query` on the worker pool unless it is cached or in flight"""
+        if self.lookup(query, count_hit=False) is not None:
+            return None
+        with self._lock:
+            future = self._inflight.get(normalize_query(query))
+            if future is not None:
+                return future
+            self.prefetches += 1
+        return self._submit(query)
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for key in [k for k, (fetched_at, _) in self._memory.items() if fetched_at < cutoff]:
+                del self._memory[key]
+            if self._db is not None:
+                self._db.execute("DELETE FROM research WHERE fetched_at < ?", (cutoff,))
+                self._db.commit()
+
+    def stats(self):
+        served = self.memory_hits + self.disk_hits + self.inflight_waits
+        lookups = served + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "prefetches": self.prefetches,
+            "inflight_waits": self.inflight_waits,
+            "entries": len(self._memory),
+            "hit_rate": served / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if hasattr(self.fetcher, "close"):
+            self.fetcher.close()
+
+
+def make_research_cache(backend="web", db_path=None, index_path=None, docs_path=None):
+    """ResearchCache over DuckDuckGo ("web") or a local_index.LocalIndex ("local")
+
+    For the local backend, documents under `docs_path` are indexed first
+    (only new and changed files). Local results are cheap to recompute, so
+    they are only cached in memory.
+    """
+    if backend == "web":
+        return ResearchCache(db_path=db_path)
+    if backend != "local":
+        raise ValueError(f"Research backend must be one of {RESEARCH_BACKENDS}")
+    from local_index import DEFAULT_INDEX_PATH, LocalIndex
+    index = LocalIndex(index_path or DEFAULT_INDEX_PATH)
+    if docs_path:
+        started = time.perf_counter()
+        counts = index.add_directory(docs_path)
+        print(f"Research index: {counts['added']} added, {counts['updated']} updated, {counts['removed']} removed, "
+              f"{counts['unchanged']} unchanged in {time.perf_counter() - started:.1f}s")
+    return ResearchCache(fetcher=index)
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_research_cache():
+    """Return the process-wide research cache used when an agent is not given one"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ResearchCache()
+        return _default_cache
+
+
+class ResearchPrefetcher:
+    """Wraps a stream callback and starts the next speaker's research early
+
+    As soon as the current speaker's first sentence has streamed in, the next
+    speaker's query (topic + that sentence) is known, so its fetch and parse run
+    on the cache's worker pool while generation continues.
+
+    `message` turns (speaker, text) into the message the next speaker is
+    given, so the prefetched query matches the one that speaker researches
+    (e.g. debate_engine.panel_message in a panel); by default it is the text.
+    """
+
+    def __init__(self, research_cache, topic, message=None):
+        self.research_cache = research_cache
+        self.topic = topic
+        self.message = message or (lambda name, text: text)
+        self._texts = {}
+        self._started = set()
+
+    def _start(self, name):
+        if name in self._started:
+            return
+        self._started.add(name)
+        self.research_cache.prefetch(research_query(self.topic, self.message(name, "".join(self._texts[name]))))
+
+    def wrap(self, callback):
+        def prefetching_callback(name, delta, streaming=False):
+            if streaming:
+                texts = self._texts.setdefault(name, [])
+                texts.append(delta)
+                # Sentences are split across deltas, so test everything received so far
+                if name not in self._started and first_sentence_complete("".join(texts)):
+                    self._start(name)
+            elif name in self._texts:
+                # End of the response: make sure a prefetch ran, then reset for the next turn
+                self._start(name)
+                del self._texts[name]
+                self._started.discard(name)
+            if callback:
+                callback(name, delta, streaming=streaming)
+        return prefetching_callback
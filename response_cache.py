@@ -0,0 +1,276 @@
+"""Deterministic record/replay layer for Ollama generations
+
+Wrap the shared client in a CachingClient and hand it to the agents:
+
+    client = CachingClient(OllamaClient(), ResponseCache("responses.sqlite3"), mode="record")
+    ...
+    client = CachingClient(None, ResponseCache("responses.sqlite3"), mode="replay", delay="none")
+
+Responses are keyed on the whole /api/generate payload (model, prompt,
+system, context and options, which include the seed), so a replayed debate
+gets exactly the turns that were recorded for the same inputs.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import requests
+
+from ollama_client import DEFAULT_BASE_URL, OllamaClient
+
+CACHE_MODES = ("passthrough", "record", "replay")
+
+
+class ResponseCacheMiss(requests.exceptions.RequestException):
+    """A replay found no recording for the request"""
+
+
+def request_key(data):
+    """Stable cache key for a generate payload
+
+    keep_alive does not change the answer, so it is left out. stream is kept
+    (Ollama streams when it is absent), because a streamed recording is many
+    NDJSON lines and cannot be replayed as a single non-streamed body.
+    """
+    payload = {key: value for key, value in data.items() if key != "keep_alive"}
+    payload["stream"] = bool(data.get("stream", True))
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite store of recorded responses as NDJSON lines with their arrival times"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                         "request TEXT NOT NULL, lines TEXT NOT NULL, recorded_at REAL NOT NULL)")
+        self._db.commit()
+
+    def get(self, key):
+        """Return the recorded [[seconds, line], ...] for `key`, or None"""
+        with self._lock:
+            row = self._db.execute("SELECT lines FROM responses WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, data, lines):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, model, request, lines, recorded_at) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             (key, data.get("model", ""), json.dumps(data, ensure_ascii=False),
+                              json.dumps(lines, ensure_ascii=False), time.time()))
+            self._db.commit()
+
+    def models(self):
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT DISTINCT model FROM responses ORDER BY model")]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class RecordingResponse:
+    """Passes a live response through while capturing its lines and timings
+
+    A complete stream is stored when it ends. A stream the consumer stopped
+    reading on purpose (sentence limit, cancelled turn) is stored as far as
+    it was read, so replay stops at the same point. Streams that failed
+    (transport errors, error chunks) are not stored.
+    """
+
+    def __init__(self, response, on_complete):
+        self._response = response
+        self._on_complete = on_complete
+        self.status_code = response.status_code
+        self.raw = response.raw  # lets OllamaClient.abort reach the socket
+        self.aborted = False  # set by CachingClient.abort: a read error after it is our own doing
+        self._lines = []
+        self._done = False
+
+    def iter_content(self, chunk_size=None):
+        started = time.perf_counter()
+        buffer = b""
+        try:
+            for block in self._response.iter_content(chunk_size=chunk_size):
+                buffer += block
+                *complete, buffer = buffer.split(b"\n")
+                now = round(time.perf_counter() - started, 4)
+                self._lines.extend([now, line.decode("utf-8")] for line in complete if line.strip())
+                yield block
+        except GeneratorExit:
+            # The consumer stopped reading; a partial last line is left out
+            self._store()
+            raise
+        except Exception:
+            if self.aborted:
+                self._store()
+            self._done = True
+            raise
+        if buffer.strip():
+            self._lines.append([round(time.perf_counter() - started, 4), buffer.decode("utf-8")])
+        # A stream that ended without its final chunk was cut off by the server
+        if self._lines and self._is_final(self._lines[-1][1]):
+            self._store()
+        self._done = True
+
+    def _store(self):
+        if self._done:
+            return
+        self._done = True
+        if self._lines and not any(self._is_error(line) for _, line in self._lines):
+            self._on_complete(self._lines)
+
+    @staticmethod
+    def _chunk(line):
+        try:
+            chunk = json.loads(line)
+        except ValueError:
+            return None
+        return chunk if isinstance(chunk, dict) else None
+
+    @classmethod
+    def _is_final(cls, line):
+        chunk = cls._chunk(line)
+        return chunk is not None and chunk.get("done") and "error" not in chunk
+
+    @classmethod
+    def _is_error(cls, line):
+        chunk = cls._chunk(line)
+        return chunk is None or "error" in chunk
+
+    def json(self):
+        data = self._response.json()
+        self._on_complete([[0.0, json.dumps(data, ensure_ascii=False)]])
+        return data
+
+    def close(self):
+        # The consumer may return before the generator is finalized; what it read is kept either way
+        self._store()
+        self._response.close()
+
+
+class ReplayResponse:
+    """Serves recorded lines, optionally with their original timing"""
+
+    raw = None
+    status_code = 200
+
+    def __init__(self, lines, delay=True):
+        self._lines = lines
+        self._delay = delay
+        self._closed = threading.Event()
+
+    def iter_content(self, chunk_size=None):
+        previous = 0.0
+        for offset, line in self._lines:
+            if self._delay and offset > previous:
+                # close() from another thread ends the wait early
+                if self._closed.wait(offset - previous):
+                    return
+            elif self._closed.is_set():
+                return
+            previous = offset
+            yield (line + "\n").encode("utf-8")
+
+    def json(self):
+        return json.loads(self._lines[-1][1])
+
+    def close(self):
+        self._closed.set()
+
+
+class CachingClient:
+    """Drop-in for OllamaClient that records or replays /api/generate responses
+
+    Modes:
+    - "passthrough": no caching at all
+    - "record": every completed response is stored (replacing older recordings)
+    - "replay": responses come from the cache only; a miss raises ResponseCacheMiss.
+      `delay` is "original" to keep the recorded chunk timing or "none" to
+      return as fast as possible. No Ollama server is needed.
+    """
+
+    def __init__(self, client=None, cache=None, mode="replay", delay="original"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Cache mode must be one of {CACHE_MODES}")
+        if mode != "replay" and client is None:
+            raise ValueError(f"Mode {mode!r} needs a live client")
+        self.client = client
+        self.cache = cache
+        self.mode = mode
+        self.delay = delay
+        self.base_url = client.base_url if client is not None else DEFAULT_BASE_URL
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self.request_count = 0
+
+    def __getattr__(self, name):
+        # Everything else (session, timeout, pool_stats, ...) belongs to the live client
+        if self.client is None:
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def get_tags(self):
+        if self.mode == "replay":
+            return {"models": [{"name": model, "model": model} for model in self.cache.models()]}
+        return self.client.get_tags()
+
+    def generate(self, data, stream=True):
+        self.request_count += 1
+        if self.mode == "passthrough":
+            return self.client.generate(data, stream=stream)
+
+        key = request_key(data)
+        if self.mode == "replay":
+            lines = self.cache.get(key)
+            if lines is None:
+                self.misses += 1
+                raise ResponseCacheMiss(f"No recorded response for this {data.get('model')} request")
+            self.hits += 1
+            return ReplayResponse(lines, delay=stream and self.delay == "original")
+
+        def store(lines):
+            self.cache.put(key, data, lines)
+            self.recorded += 1
+
+        return RecordingResponse(self.client.generate(data, stream=stream), store)
+
+    def pool_stats(self):
+        if self.client is not None:
+            return self.client.pool_stats()
+        return {"base_url": self.base_url, "requests": self.request_count, "connections_opened": 0,
+                "pool_requests": 0, "reuse_ratio": 0.0}
+
+    @staticmethod
+    def abort(response):
+        if isinstance(response, ReplayResponse):
+            response.close()
+            return
+        if isinstance(response, RecordingResponse):
+            response.aborted = True
+        OllamaClient.abort(response)
+
+    def stats(self):
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.cache.close()
+
+
+def wrap_client(client, path, mode="record", delay="original"):
+    """`client` behind a CachingClient on the cache at `path` (replay drops the live client)"""
+    if not path or mode == "passthrough":
+        return client
+    return CachingClient(None if mode == "replay" else client, ResponseCache(path), mode=mode, delay=delay)
@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+
+SESSION_VERSION = 1
+
+
+class SessionState:
+    """What a session file says about a debate: its setup, finished turns, summary and scores"""
+
+    def __init__(self, header=None):
+        self.header = header or {}
+        self.turns = []  # completed turns: {"turn", "round", "agent", "text", "error"}
+        self.summary = []
+        self.scores = {}
+        self.events = []  # every record in order, for replay
+
+    @property
+    def topic(self):
+        return self.header.get("topic", "")
+
+    @property
+    def mode(self):
+        return self.header.get("mode", "debate")
+
+    def opening_turns(self):
+        return [turn for turn in self.turns if turn["round"] == "opening"]
+
+    def round_turns(self):
+        return [turn for turn in self.turns if turn["round"] != "opening"]
+
+
+def load_session(path):
+    """Rebuild a SessionState from a session file
+
+    Turns that never reached their turn_end record (the app closed or the
+    debate was stopped mid-turn) are dropped, so a resume regenerates them.
+    A torn last line from a crash is ignored.
+    """
+    state = SessionState()
+    open_turns = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            kind = record.get("type")
+            state.events.append(record)
+            if kind == "session":
+                state.header = record
+            elif kind == "turn_start":
+                open_turns[record["turn"]] = {"turn": record["turn"], "round": record["round"],
+                                              "agent": record["agent"], "parts": []}
+            elif kind == "delta" and record["turn"] in open_turns:
+                open_turns[record["turn"]]["parts"].append(record["text"])
+            elif kind == "turn_end" and record["turn"] in open_turns:
+                turn = open_turns.pop(record["turn"])
+                turn["text"] = "".join(turn.pop("parts"))
+                turn["error"] = record.get("error")
+                state.turns.append(turn)
+            elif kind == "summary":
+                state.summary.append(record["text"])
+            elif kind == "score":
+                state.scores[record["agent"]] = record["score"]
+    return state
+
+
+class SessionStore:
+    """Append-only JSONL log of one debate, written while the turns stream
+
+    Streamed text is coalesced in memory and written as one "delta" record per
+    `flush_interval` seconds (or `flush_chars` characters), in a single write
+    call, so disk traffic is close to the size of the transcript itself.
+    Turn boundaries, summaries and scores are flushed at once; with `fsync`,
+    each completed turn is also forced to disk.
+    """
+
+    def __init__(self, path, flush_interval=0.25, flush_chars=512, fsync=False):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_chars = flush_chars
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._buffer = []  # encoded lines not yet written
+        self._text = []  # streamed text of the current turn not yet turned into a record
+        self._text_chars = 0
+        self._last_flush = time.monotonic()
+        self._turn = None
+        self._agent = None
+        self.next_turn = 0
+        self.bytes_written = 0
+        self.write_calls = 0
+        self.started = time.time()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+
+    @classmethod
+    def create(cls, directory, topic, mode, agents, **kwargs):
+        """Start a new session file named after the current time in `directory`"""
+        path = os.path.join(directory, f"session-{time.strftime('%Y%m%d-%H%M%S')}.jsonl")
+        store = cls(path, **kwargs)
+        store._append({
+            "type": "session",
+            "version": SESSION_VERSION,
+            "topic": topic,
+            "mode": mode,
+            "agents": [{"name": agent.name, "model": agent.model, "stance": agent.default_stance}
+                       for agent in agents],
+            "started_at": store.started,
+        }, flush=True)
+        return store
+
+    @classmethod
+    def resume(cls, path, **kwargs):
+        """Load `path` and reopen it for appending; returns (store, state)"""
+        state = load_session(path)
+        store = cls(path, **kwargs)
+        store.started = state.header.get("started_at", store.started)
+        store.next_turn = max((event.get("turn", -1) for event in state.events), default=-1) + 1
+        store._append({"type": "resume", "completed_turns": len(state.turns)}, flush=True)
+        return store, state
+
+    def _append(self, record, flush=False):
+        record["t"] = round(time.time() - self.started, 3)
+        self._buffer.append((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        if flush:
+            self._flush()
+
+    def _take_text(self):
+        if self._text:
+            self._append({"type": "delta", "turn": self._turn, "text": "".join(self._text)})
+            self._text = []
+            self._text_chars = 0
+
+    def _flush(self, sync=False):
+        if self._buffer:
+            data = b"".join(self._buffer)
+            self._buffer = []
+            self._file.write(data)
+            self._file.flush()
+            self.bytes_written += len(data)
+            self.write_calls += 1
+        if sync:
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def begin_turn(self, agent_name, round_label):
+        """Mark the start of a turn; returns its index"""
+        with self._lock:
+            self._take_text()
+            self._turn = self.next_turn
+            self._agent = agent_name
+            self.next_turn += 1
+            self._append({"type": "turn_start", "turn": self._turn, "round": round_label, "agent": agent_name})
+            return self._turn
+
+    def stream(self, agent_name, text):
+        """Record streamed text of the current turn"""
+        if not text:
+            return
+        with self._lock:
+            if self._turn is None or agent_name != self._agent:
+                return
+            self._text.append(text)
+            self._text_chars += len(text)
+            if (self._text_chars >= self.flush_chars
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._take_text()
+                self._flush()
+
+    def end_turn(self, error=None):
+        """Mark the current turn complete; only completed turns are resumed"""
+        with self._lock:
+            if self._turn is None:
+                return
+            self._take_text()
+            self._append({"type": "turn_end", "turn": self._turn, "error": error})
+            self._turn = None
+            self._agent = None
+            self._flush(sync=self.fsync)
+
+    def add_summary(self, text):
+        with self._lock:
+            self._append({"type": "summary", "text": text}, flush=True)
+
+    def set_score(self, agent_name, score):
+        with self._lock:
+            self._append({"type": "score", "agent": agent_name, "score": score}, flush=True)
+
+    def close(self):
+        with self._lock:
+            self._take_text()
+            self._flush()
+            self._file.close()
+
+
+def replay_events(state, speed=1.0, max_gap=5.0):
+    """Yield (delay_seconds, record) to replay a session
+
+    `speed` scales the recorded timing (2.0 plays twice as fast; 0 replays
+    instantly). Gaps longer than `max_gap` seconds, such as the time between
+    a session and its resume, are shortened to `max_gap`.
+    """
+    previous = None
+    for record in state.events:
+        t = record.get("t", 0.0)
+        gap = 0.0 if previous is None else min(max(0.0, t - previous), max_gap)
+        previous = t
+        yield (gap / speed if speed else 0.0), record
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 from theme import DebateTheme
+from pacing import PacingPolicy
+from generation_budget import GenerationBudget
 
 class SettingsManager:
     def __init__(self, root, agents):
@@ -15,8 +17,25 @@ class SettingsManager:
         # Set theme
         DebateTheme.setup_styles()
         
+        # The Apply button stays at the bottom; the sections scroll above it
+        button_frame = ttk.Frame(self.window, style="Settings.TFrame")
+        button_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        canvas = tk.Canvas(self.window, bg=DebateTheme.BACKGROUND, highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=canvas.yview)
+        canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrolled = ttk.Frame(canvas, style="Settings.TFrame")
+        scrolled_id = canvas.create_window((0, 0), window=scrolled, anchor=tk.NW)
+        scrolled.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        canvas.bind("<Configure>", lambda e: canvas.itemconfigure(scrolled_id, width=e.width))
+        # Every widget in the window has it in its bindtags, so the wheel works anywhere over the form
+        self.window.bind("<MouseWheel>", lambda e: canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.window.bind("<Button-4>", lambda e: canvas.yview_scroll(-1, "units"))
+        self.window.bind("<Button-5>", lambda e: canvas.yview_scroll(1, "units"))
+        
         # Create main frame with padding and style
-        main_frame = ttk.Frame(self.window, style="Settings.TFrame")
+        main_frame = ttk.Frame(scrolled, style="Settings.TFrame")
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
         
         # Title
@@ -74,9 +93,78 @@ class SettingsManager:
                  style="Settings.TLabel",
                  wraplength=400).pack(anchor=tk.W, pady=(0, 10))
         
+        # Pacing Section
+        pacing_frame = self._create_section(sections_frame, "Turn Pacing")
+        self.pacing_var = tk.StringVar(value="fixed")
+        ttk.Radiobutton(pacing_frame, text="No Delay",
+                       variable=self.pacing_var, value="none",
+                       style="Settings.TRadiobutton").pack(anchor=tk.W, pady=2)
+        ttk.Radiobutton(pacing_frame, text="Fixed Delay (2 seconds)",
+                       variable=self.pacing_var, value="fixed",
+                       style="Settings.TRadiobutton").pack(anchor=tk.W, pady=2)
+        ttk.Radiobutton(pacing_frame, text="Reading Speed (based on previous response length)",
+                       variable=self.pacing_var, value="reading",
+                       style="Settings.TRadiobutton").pack(anchor=tk.W, pady=2)
+        
+        # Performance Section
+        performance_frame = self._create_section(sections_frame, "Performance")
+        self.reuse_context_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(performance_frame, text="Reuse Model Context Between Turns",
+                       variable=self.reuse_context_var,
+                       style="Settings.TCheckbutton").pack(anchor=tk.W, pady=2)
+        ttk.Label(performance_frame,
+                 text="Send only the new turn and let the model continue from its previous context.",
+                 style="Settings.TLabel",
+                 wraplength=400).pack(anchor=tk.W, pady=(0, 10))
+        memory_row = ttk.Frame(performance_frame, style="Settings.TFrame")
+        memory_row.pack(anchor=tk.W, pady=2)
+        ttk.Label(memory_row, text="Debate memory (tokens, 0 = previous turn only)",
+                 style="Settings.TLabel").pack(side=tk.LEFT)
+        self.memory_budget_var = tk.StringVar(value="0")
+        ttk.Spinbox(memory_row, from_=0, to=8000, increment=100,
+                    textvariable=self.memory_budget_var, width=8).pack(side=tk.LEFT, padx=(10, 0))
+        summary_row = ttk.Frame(performance_frame, style="Settings.TFrame")
+        summary_row.pack(anchor=tk.W, pady=2)
+        ttk.Label(summary_row, text="Summary model", style="Settings.TLabel").pack(side=tk.LEFT)
+        self.summary_model_var = tk.StringVar(value="")
+        ttk.Entry(summary_row, textvariable=self.summary_model_var, width=24).pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Label(performance_frame,
+                 text="Older turns are summarized between turns so prompts stay within this size. "
+                      "Leave the model empty to use the first agent's; a smaller one is cheaper.",
+                 style="Settings.TLabel",
+                 wraplength=400).pack(anchor=tk.W, pady=(0, 10))
+        
+        # Generation Budget Section
+        budget_frame = self._create_section(sections_frame, "Generation Budget")
+        self.budget_target_var = tk.StringVar(value="All agents")
+        self.num_predict_var = tk.StringVar()
+        self.max_sentences_var = tk.StringVar()
+        self.temperature_var = tk.StringVar()
+        self.seed_var = tk.StringVar()
+        self.stop_var = tk.StringVar()
+        fields = [
+            ("Apply to", ttk.Combobox(budget_frame, textvariable=self.budget_target_var, state="readonly", width=20,
+                                      values=["All agents"] + [agent.name for agent in agents])),
+            ("Max tokens (0 = no limit)", ttk.Spinbox(budget_frame, from_=0, to=4096, increment=16,
+                                                      textvariable=self.num_predict_var, width=8)),
+            ("Sentence limit (0 = off)", ttk.Spinbox(budget_frame, from_=0, to=20,
+                                                     textvariable=self.max_sentences_var, width=8)),
+            ("Temperature (blank = default)", ttk.Entry(budget_frame, textvariable=self.temperature_var, width=8)),
+            ("Seed (blank = random)", ttk.Entry(budget_frame, textvariable=self.seed_var, width=8)),
+            ("Stop sequences (separate with |)", ttk.Entry(budget_frame, textvariable=self.stop_var, width=20)),
+        ]
+        for row, (label, widget) in enumerate(fields):
+            ttk.Label(budget_frame, text=label, style="Settings.TLabel").grid(row=row, column=0, sticky=tk.W, pady=2)
+            widget.grid(row=row, column=1, sticky=tk.W, padx=(10, 0), pady=2)
+        ttk.Label(budget_frame,
+                 text="Budgets are kept per agent and per interaction mode; these fields edit the selected mode.",
+                 style="Settings.TLabel",
+                 wraplength=400).grid(row=len(fields), column=0, columnspan=2, sticky=tk.W, pady=(5, 10))
+        self.load_budget_fields()
+        self.mode_var.trace_add("write", lambda *_: self.load_budget_fields())
+        self.budget_target_var.trace_add("write", lambda *_: self.load_budget_fields())
+        
         # Apply Button with padding
-        button_frame = ttk.Frame(main_frame, style="Settings.TFrame")
-        button_frame.pack(fill=tk.X, pady=20)
         apply_button = ttk.Button(button_frame, text="Apply Settings",
                                 command=self.apply_settings,
                                 style="Primary.TButton")
@@ -100,16 +188,55 @@ class SettingsManager:
         
         return content_frame
         
+    def budget_agents(self):
+        """Agents the generation budget fields apply to"""
+        target = self.budget_target_var.get()
+        return [agent for agent in self.agents if target == "All agents" or agent.name == target]
+
+    def load_budget_fields(self):
+        """Show the budget of the first selected agent for the selected mode"""
+        agents = self.budget_agents()
+        if not agents:
+            return
+        budget = agents[0].generation_budget(self.mode_var.get())
+        self.num_predict_var.set(str(budget.num_predict or 0))
+        self.max_sentences_var.set(str(budget.max_sentences or 0))
+        self.temperature_var.set("" if budget.temperature is None else str(budget.temperature))
+        self.seed_var.set("" if budget.seed is None else str(budget.seed))
+        self.stop_var.set("|".join(stop.replace("\n", "\\n") for stop in budget.stop))
+
+    def read_budget_fields(self):
+        """Build a GenerationBudget from the form; raises ValueError on bad input"""
+        temperature = self.temperature_var.get().strip()
+        seed = self.seed_var.get().strip()
+        stops = [stop.replace("\\n", "\n") for stop in self.stop_var.get().split("|") if stop]
+        return GenerationBudget(
+            num_predict=int(self.num_predict_var.get() or 0) or None,
+            stop=stops,
+            temperature=float(temperature) if temperature else None,
+            seed=int(seed) if seed else None,
+            max_sentences=int(self.max_sentences_var.get() or 0) or None,
+        )
+
     def apply_settings(self):
         try:
+            budget = self.read_budget_fields()
+            for agent in self.budget_agents():
+                agent.set_generation_budget(budget.copy(), self.mode_var.get())
+            
             # Apply settings to all agents
             for agent in self.agents:
                 agent.set_mode(self.mode_var.get())
                 agent.set_unrestricted(self.unrestricted_var.get())
                 agent.set_personality_enabled(self.personality_var.get())
+                if agent.reuse_context != self.reuse_context_var.get():
+                    agent.set_context_reuse(self.reuse_context_var.get())
             
             # Store web research setting for access
             self.web_research_enabled = self.web_research_var.get()
+            self.pacing_mode = self.pacing_var.get()
+            self.memory_budget = max(0, int(self.memory_budget_var.get() or 0))
+            self.summary_model = self.summary_model_var.get().strip() or None
             
             # Show success message with checkmark
             self.status_label.configure(
@@ -130,3 +257,17 @@ class SettingsManager:
         
     def get_web_research_enabled(self):
         return getattr(self, 'web_research_enabled', False)
+    
+    def get_memory_budget(self):
+        return getattr(self, 'memory_budget', 0)
+    
+    def get_summary_model(self):
+        return getattr(self, 'summary_model', None)
+    
+    def get_pacing_policy(self):
+        mode = getattr(self, 'pacing_mode', "fixed")
+        if mode == "none":
+            return PacingPolicy.none()
+        if mode == "reading":
+            return PacingPolicy.reading()
+        return PacingPolicy.fixed(2.0)
@@ -0,0 +1,135 @@
+import json
+import time
+
+try:
+    import orjson
+except ImportError:  # optional faster backend
+    orjson = None
+
+_scan_once = json.JSONDecoder().scan_once
+
+
+def _stdlib_loads(line):
+    """json.loads for one UTF-8 line without the per-call encoding detection"""
+    try:
+        return _scan_once(line.decode("utf-8").strip(), 0)[0]
+    except StopIteration:
+        raise ValueError("Expecting value")
+
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    _loads = orjson.loads
+else:
+    JSON_BACKEND = "json"
+    _loads = _stdlib_loads
+
+
+class NDJSONStreamDecoder:
+    """Incremental decoder for Ollama's NDJSON stream that works on raw bytes
+
+    Feed it network blocks of any size; complete lines are parsed straight from
+    the byte buffer, text deltas are collected in a list and joined once, and
+    the arrival time of every chunk is kept for latency analysis.
+    """
+
+    def __init__(self, text_key="response", loads=None):
+        self.text_key = text_key
+        self.loads = loads or _loads
+        self.zero_copy = self.loads is _loads and orjson is not None
+        if self.loads is json.loads:
+            self.loads = _stdlib_loads
+        self._buffer = bytearray()
+        self.parts = []
+        self.final = None
+        self.error = None
+        self.chunk_count = 0
+        self.decode_errors = 0
+        self.bytes_received = 0
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.chunk_times = []  # seconds since start for each text chunk
+
+    def _handle(self, line, out):
+        try:
+            content = self.loads(line)
+        except ValueError:  # orjson.JSONDecodeError subclasses ValueError too
+            self.decode_errors += 1
+            return
+        if not isinstance(content, dict):
+            return
+        if "error" in content:
+            self.error = content["error"]
+        delta = content.get(self.text_key)
+        if delta.__class__ is dict:  # /api/chat nests the text in message.content
+            delta = delta.get("content")
+        if delta:
+            now = time.perf_counter() - self.started_at
+            if self.first_token_at is None:
+                self.first_token_at = now
+            self.chunk_times.append(now)
+            self.parts.append(delta)
+            self.chunk_count += 1
+        else:
+            delta = ""
+        if content.get("done"):
+            self.final = content
+        out.append((content, delta))
+
+    def feed(self, data):
+        """Consume a block of bytes and return [(chunk_dict, delta)] for complete lines"""
+        out = []
+        if not data:
+            return out
+        self.bytes_received += len(data)
+        buffer = self._buffer
+        buffer += data
+        start = 0
+        # orjson parses straight from a memoryview; the stdlib needs a bytes slice
+        view = memoryview(buffer) if self.zero_copy else buffer
+        handle = self._handle
+        try:
+            while True:
+                end = buffer.find(b"\n", start)
+                if end == -1:
+                    break
+                if end > start:
+                    handle(view[start:end], out)
+                start = end + 1
+        finally:
+            if self.zero_copy:
+                view.release()
+        if start:
+            del buffer[:start]
+        return out
+
+    def finish(self):
+        """Parse whatever is left in the buffer once the stream has ended"""
+        out = []
+        if self._buffer.strip():
+            self._handle(bytes(self._buffer), out)
+        self._buffer.clear()
+        return out
+
+    def iter_stream(self, blocks):
+        """Yield (chunk_dict, delta) pairs from an iterable of byte blocks"""
+        for block in blocks:
+            yield from self.feed(block)
+        yield from self.finish()
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    def timing(self):
+        """Per-stream timing summary in seconds"""
+        elapsed = time.perf_counter() - self.started_at
+        gaps = [b - a for a, b in zip(self.chunk_times, self.chunk_times[1:])]
+        return {
+            "time_to_first_token": self.first_token_at,
+            "elapsed": elapsed,
+            "chunks": self.chunk_count,
+            "bytes": self.bytes_received,
+            "max_gap": max(gaps) if gaps else 0.0,
+            "mean_gap": sum(gaps) / len(gaps) if gaps else 0.0,
+        }
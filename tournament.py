@@ -0,0 +1,261 @@
+"""Round-robin tournaments between personas, rated Elo-style
+
+Every pair of personas debates every topic. Each pairing splits pro and
+con evenly across the topics, so each persona of a pair is pro on half of
+them (or, with --both-sides, each pairing plays each topic from both
+sides). Debates run on the batch runner's worker pool, and the judge
+(judge.TurnJudge) decides each one: whichever side's turns rate higher on
+average wins, and near-equal averages are a draw.
+
+Results are appended to the output JSONL as they finish. Re-running the
+same command skips debates that already finished without an error, so a
+sweep can be stopped and resumed at any point. The rating table is always
+rebuilt from the whole file.
+
+    python tournament.py --topics topics.txt --out tournament.jsonl --workers 8 --rounds 4
+    python tournament.py --out tournament.jsonl --table     # ratings only
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+
+from backend_pool import make_client
+from batch_runner import BatchRunner
+from model_scheduler import ModelSwapScheduler, warm_up
+from ollama_client import DEFAULT_BASE_URL
+from personas import PERSONAS
+
+
+def topic_id(topic):
+    """Short id for a topic's text, unaffected by where it sits in the topic list"""
+    return hashlib.sha1(topic.encode("utf-8")).hexdigest()[:10]
+
+
+def pairing_sides(first, second, topics):
+    """{topic: (pro, con)} for one pairing, balanced over the topics
+
+    Each topic's side comes from a hash of the topic and the pairing, then
+    the fewest topics needed are flipped so each persona is pro on half the
+    topics (one more for either of them when their number is odd). Sides
+    ignore list order, and adding or removing a topic flips at most one
+    other topic's side.
+    """
+    keys = {topic: hashlib.sha1(f"{topic_id(topic)}:{first}:{second}".encode("utf-8")).digest()
+            for topic in topics}
+    first_pro = sorted(topic for topic, key in keys.items() if key[0] % 2 == 0)
+    second_pro = sorted(topic for topic, key in keys.items() if key[0] % 2 == 1)
+    more, fewer = (first_pro, second_pro) if len(first_pro) > len(second_pro) else (second_pro, first_pro)
+    more.sort(key=keys.get)
+    for _ in range((len(more) - len(fewer)) // 2):
+        fewer.append(more.pop(0))
+    sides = {topic: (first, second) for topic in first_pro}
+    sides.update({topic: (second, first) for topic in second_pro})
+    return sides
+
+
+def tournament_jobs(persona_keys, topics, both_sides=False):
+    """One job per pairing, topic and side
+
+    Ids are the topic text's id plus pro:con, so finished jobs are still
+    skipped after topics are added, removed or reordered (see pairing_sides
+    for when a side can change).
+    """
+    jobs = []
+    pairings = {pair: pairing_sides(*pair, topics) for pair in itertools.combinations(persona_keys, 2)}
+    for topic in topics:
+        topic_key = topic_id(topic)
+        for (first, second), sides_by_topic in pairings.items():
+            sides = [(first, second), (second, first)] if both_sides else [sides_by_topic[topic]]
+            for pro, con in sides:
+                jobs.append({
+                    "id": f"{topic_key}:{pro}:{con}",
+                    "topic": topic,
+                    "agents": [pro, con],
+                    "stances": ["pro", "con"],
+                    "judge": True,
+                })
+    return jobs
+
+
+def debate_outcome(record, margin=0.5):
+    """1.0 if the first (pro) agent won, 0.0 if it lost, 0.5 for a draw, None if undecided"""
+    ratings = {name: [] for name in record.get("agents", [])}
+    for judgement in record.get("judgements", []):
+        if judgement["rating"] is not None and judgement["agent"] in ratings:
+            ratings[judgement["agent"]].append(judgement["rating"])
+    if len(ratings) != 2 or not all(ratings.values()):
+        return None
+    first, second = (sum(values) / len(values) for values in ratings.values())
+    if abs(first - second) < margin:
+        return 0.5
+    return 1.0 if first > second else 0.0
+
+
+class EloTable:
+    """Elo ratings with win/draw/loss counts"""
+
+    def __init__(self, k=32.0, initial=1500.0):
+        self.k = k
+        self.initial = initial
+        self.players = {}
+
+    def _player(self, name):
+        if name not in self.players:
+            self.players[name] = {"rating": self.initial, "games": 0, "wins": 0, "draws": 0, "losses": 0}
+        return self.players[name]
+
+    def expected(self, a, b):
+        return 1.0 / (1.0 + 10 ** ((self._player(b)["rating"] - self._player(a)["rating"]) / 400.0))
+
+    def record(self, a, b, score_a):
+        """Record a game where `a` scored `score_a` (1 win, 0.5 draw, 0 loss) against `b`"""
+        expected_a = self.expected(a, b)
+        player_a, player_b = self._player(a), self._player(b)
+        player_a["rating"] += self.k * (score_a - expected_a)
+        player_b["rating"] += self.k * ((1.0 - score_a) - (1.0 - expected_a))
+        for player, score in ((player_a, score_a), (player_b, 1.0 - score_a)):
+            player["games"] += 1
+            player["wins" if score == 1.0 else "losses" if score == 0.0 else "draws"] += 1
+
+    def rows(self):
+        return sorted(({"name": name, **stats} for name, stats in self.players.items()),
+                      key=lambda row: row["rating"], reverse=True)
+
+    def format(self):
+        lines = [f"{'#':>3}  {'Persona':<24} {'Elo':>6} {'W':>4} {'D':>4} {'L':>4}"]
+        for rank, row in enumerate(self.rows(), 1):
+            lines.append(f"{rank:>3}  {row['name']:<24} {row['rating']:>6.0f} "
+                         f"{row['wins']:>4} {row['draws']:>4} {row['losses']:>4}")
+        return "\n".join(lines)
+
+
+def load_results(path):
+    """Records already in the output file, keyed by job id; a torn last line is ignored"""
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            # A retried job appears again later in the file; the newest record wins
+            results[record["id"]] = record
+    return results
+
+
+def rating_table(records, k=32.0, margin=0.5):
+    table = EloTable(k=k)
+    for record in sorted(records, key=lambda record: record.get("started_at", 0)):
+        outcome = debate_outcome(record, margin) if not record.get("error") else None
+        if outcome is not None:
+            table.record(record["agents"][0], record["agents"][1], outcome)
+    return table
+
+
+class TournamentRunner(BatchRunner):
+    """BatchRunner that reports tournament progress and throughput as debates finish"""
+
+    def __init__(self, out_path, total, report_every=60.0, **kwargs):
+        super().__init__(out_path, **kwargs)
+        self.total = total
+        self.report_every = report_every
+        self.started = time.time()
+        self.finished = 0
+        self.tokens = 0
+        self._last_report = self.started
+        self._stats_lock = threading.Lock()
+
+    def write(self, record):
+        super().write(record)
+        with self._stats_lock:
+            self.finished += 1
+            self.tokens += sum(turn.get("tokens", 0) for turn in record["turns"])
+            if time.time() - self._last_report >= self.report_every or self.finished == self.total:
+                self._last_report = time.time()
+                print(self.progress())
+
+    def throughput(self):
+        hours = max(time.time() - self.started, 1e-6) / 3600
+        return {
+            "finished": self.finished,
+            "remaining": self.total - self.finished,
+            "debates_per_hour": self.finished / hours,
+            "tokens_per_hour": self.tokens / hours,
+        }
+
+    def progress(self):
+        stats = self.throughput()
+        eta = stats["remaining"] / stats["debates_per_hour"] if stats["debates_per_hour"] else 0.0
+        return (f"Tournament: {stats['finished']}/{self.total} this run, "
+                f"{stats['debates_per_hour']:.1f} debates/hour, {stats['tokens_per_hour']:,.0f} tokens/hour, "
+                f"ETA {eta:.1f}h")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--personas", default=",".join(PERSONAS),
+                        help="comma-separated persona keys (default: all)")
+    parser.add_argument("--topics", help="text file with one topic per line")
+    parser.add_argument("--topic", action="append", default=[], help="a topic (repeatable)")
+    parser.add_argument("--out", default="tournament.jsonl", help="JSONL file of results; also the resume state")
+    parser.add_argument("--both-sides", action="store_true", help="play every topic from both sides")
+    parser.add_argument("--rounds", type=int, default=4, help="turns after the opening statements")
+    parser.add_argument("--workers", type=int, default=4, help="debates to run at once")
+    parser.add_argument("--model", help="override every agent's model")
+    parser.add_argument("--judge-model", help="model for the judge (default: the first agent's)")
+    parser.add_argument("--host", action="append", dest="hosts",
+                        help=f"Ollama base URL (default {DEFAULT_BASE_URL}); repeat to balance over several hosts")
+    parser.add_argument("--keep-alive", default="30m", help="how long Ollama keeps each model loaded after use")
+    parser.add_argument("--max-loaded-models", type=int, default=0,
+                        help="models the host keeps loaded at once; groups turns by model to limit swaps (0: off)")
+    parser.add_argument("--k", type=float, default=32.0, help="Elo K-factor")
+    parser.add_argument("--margin", type=float, default=0.5,
+                        help="average rating difference below which a debate is a draw")
+    parser.add_argument("--report-every", type=float, default=60.0, help="seconds between progress reports")
+    parser.add_argument("--table", action="store_true", help="print the rating table from --out and exit")
+    args = parser.parse_args()
+
+    if args.table:
+        print(rating_table(load_results(args.out).values(), args.k, args.margin).format())
+        return
+
+    topics = list(args.topic)
+    if args.topics:
+        with open(args.topics, "r", encoding="utf-8") as f:
+            topics += [line.strip() for line in f if line.strip()]
+    if not topics:
+        parser.error("give at least one --topic or a --topics file")
+    persona_keys = [key.strip() for key in args.personas.split(",") if key.strip()]
+    unknown = [key for key in persona_keys if key not in PERSONAS]
+    if unknown or len(persona_keys) < 2:
+        parser.error(f"need two or more known personas (unknown: {unknown}; known: {sorted(PERSONAS)})")
+
+    jobs = tournament_jobs(persona_keys, topics, args.both_sides)
+    done = {job_id for job_id, record in load_results(args.out).items() if not record.get("error")}
+    pending = [job for job in jobs if job["id"] not in done]
+    print(f"{len(jobs)} debate(s) in the tournament, {len(jobs) - len(pending)} already finished")
+
+    client = make_client(args.hosts, pool_maxsize=max(16, args.workers))
+    if hasattr(client, "start_health_checks"):
+        client.start_health_checks()
+    runner = TournamentRunner(args.out, len(pending), report_every=args.report_every, workers=args.workers,
+                              rounds=args.rounds, client=client, model=args.model,
+                              judge=True, judge_model=args.judge_model, keep_alive=args.keep_alive,
+                              model_scheduler=ModelSwapScheduler(args.max_loaded_models)
+                              if args.max_loaded_models else None)
+    warm_up(client, runner.job_models(pending) + ([args.judge_model] if args.judge_model else []), args.keep_alive)
+    try:
+        runner.run(pending)
+    finally:
+        print(runner.progress())
+        print(rating_table(load_results(args.out).values(), args.k, args.margin).format())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import json
+import os
+import threading
+import time
+
+
+class TranscriptArchive:
+    """Append-only JSONL archive for transcript entries evicted from memory
+
+    Only the byte offset of each record is kept in memory, so older entries can
+    be paged back in lazily without holding the whole transcript.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offsets = []
+        self._lock = threading.Lock()
+        # Index an existing archive so it can keep growing across sessions
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                offset = 0
+                for line in f:
+                    self._offsets.append(offset)
+                    offset += len(line)
+        self._file = None  # opened on first append so unused archives leave no file
+
+    @classmethod
+    def for_session(cls, directory, prefix="debate"):
+        """Create an archive file named after the current time in `directory`"""
+        name = f"{prefix}-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+        return cls(os.path.join(directory, name))
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, record):
+        """Write one record and return its index"""
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "ab")
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(line)
+            self._file.flush()
+            self._offsets.append(offset)
+            return len(self._offsets) - 1
+
+    def read(self, start, count=1):
+        """Return up to `count` records starting at index `start`"""
+        with self._lock:
+            if start < 0 or start >= len(self._offsets):
+                return []
+            offset = self._offsets[start]
+            count = min(count, len(self._offsets) - start)
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for _ in range(count):
+                records.append(json.loads(f.readline()))
+        return records
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class BoundedHistory(list):
+    """A list that keeps at most `max_items` entries, spilling older ones to an archive"""
+
+    def __init__(self, max_items=50, archive=None, items=()):
+        super().__init__(items)
+        self.max_items = max_items
+        self.archive = archive
+        self.archived_count = 0
+        self._trim()
+
+    def append(self, item):
+        super().append(item)
+        self._trim()
+
+    def _trim(self):
+        excess = len(self) - self.max_items
+        if excess <= 0:
+            return
+        if self.archive is not None:
+            for item in self[:excess]:
+                self.archive.append(item)
+        self.archived_count += excess
+        del self[:excess]
@@ -0,0 +1,137 @@
+"""Who speaks next in a panel debate
+
+A scheduler sees the panel and the turns so far, as (agent name, text)
+pairs, and picks the next speaker. It keeps no other state, so a resumed
+session continues exactly where it stopped.
+"""
+import re
+
+from model_scheduler import model_turn
+
+SCHEDULERS = ("round-robin", "priority", "moderator")
+
+
+class TurnScheduler:
+    """Base class: `next_speaker(history)` returns one of `agents`"""
+
+    def __init__(self, agents):
+        self.agents = list(agents)
+        if len(self.agents) < 2:
+            raise ValueError("A panel needs at least two agents")
+
+    def next_speaker(self, history):
+        raise NotImplementedError
+
+    def others(self, agent):
+        """Everyone on the panel but `agent`; pass this as `other_agent` to respond_to"""
+        others = [other for other in self.agents if other is not agent]
+        return others[0] if len(others) == 1 else others
+
+    def _index(self, name):
+        for index, agent in enumerate(self.agents):
+            if agent.name == name:
+                return index
+        return -1
+
+
+class RoundRobinScheduler(TurnScheduler):
+    """Everyone speaks in panel order, starting after whoever spoke last"""
+
+    def next_speaker(self, history):
+        if not history:
+            return self.agents[0]
+        return self.agents[(self._index(history[-1][0]) + 1) % len(self.agents)]
+
+
+class PriorityScheduler(TurnScheduler):
+    """Highest `priority(agent, history)` speaks next; ties go to panel order
+
+    The default priority favours whoever has waited longest and whoever
+    the last speaker addressed by name, and never picks the last speaker.
+    """
+
+    def __init__(self, agents, priority=None):
+        super().__init__(agents)
+        self.priority = priority or self.default_priority
+
+    def default_priority(self, agent, history):
+        waited = len(history)
+        for age, (name, _) in enumerate(reversed(history)):
+            if name == agent.name:
+                waited = age
+                break
+        addressed = bool(history) and agent.name.split()[0].lower() in history[-1][1].lower()
+        return waited + (2 if addressed else 0)
+
+    def next_speaker(self, history):
+        last = history[-1][0] if history else None
+        candidates = [agent for agent in self.agents if agent.name != last]
+        return max(candidates, key=lambda agent: self.priority(agent, history))
+
+
+class ModeratorScheduler(TurnScheduler):
+    """A model reads the recent turns and names the next speaker
+
+    Uses a short non-streaming generate on `client`, through
+    `model_scheduler` if one is given; an unusable answer falls back to
+    `fallback` (round-robin by default).
+    """
+
+    def __init__(self, agents, client, model, recent_turns=4, fallback=None, model_scheduler=None):
+        super().__init__(agents)
+        self.client = client
+        self.model = model
+        self.model_scheduler = model_scheduler
+        self.recent_turns = recent_turns
+        self.fallback = fallback or RoundRobinScheduler(agents)
+        self.calls = 0
+        self.fallbacks = 0
+
+    def build_prompt(self, history):
+        roster = "\n".join(f"- {agent.name}, {agent.occupation} ({agent.default_stance})" for agent in self.agents)
+        transcript = "\n".join(f"{name}: {text[:400]}" for name, text in history[-self.recent_turns:])
+        return (
+            "You moderate a panel debate with these participants:\n"
+            f"{roster}\n\n"
+            f"Recent turns:\n{transcript or '(none yet)'}\n\n"
+            "Who should speak next to keep the debate balanced and engaging? "
+            "The last speaker may not go again. Reply with the participant's name only."
+        )
+
+    def next_speaker(self, history):
+        last = history[-1][0] if history else None
+        self.calls += 1
+        try:
+            with model_turn(self.model_scheduler, self.model):
+                response = self.client.generate({
+                    "model": self.model,
+                    "prompt": self.build_prompt(history),
+                    "stream": False,
+                    "options": {"num_predict": 16, "temperature": 0.2},
+                }, stream=False)
+            answer = response.json().get("response", "")
+        except Exception as e:
+            print(f"Moderator failed, using {type(self.fallback).__name__}: {str(e)}")
+            answer = ""
+        for agent in self.agents:
+            if agent.name != last and re.search(rf"\b{re.escape(agent.name.split()[0])}\b", answer, re.I):
+                return agent
+        self.fallbacks += 1
+        return self.fallback.next_speaker(history)
+
+
+def make_scheduler(name, agents, client=None, model=None):
+    """Build a scheduler from its SCHEDULERS name
+
+    "moderator" uses the first agent's client, model and model scheduler
+    unless a client and model are given.
+    """
+    if name == "round-robin":
+        return RoundRobinScheduler(agents)
+    if name == "priority":
+        return PriorityScheduler(agents)
+    if name == "moderator":
+        agents = list(agents)
+        return ModeratorScheduler(agents, client or agents[0].client, model or agents[0].model,
+                                  model_scheduler=agents[0].model_scheduler)
+    raise ValueError(f"Scheduler must be one of {SCHEDULERS}")